@@ -51,6 +51,34 @@ class OFXApiClient {
         }
     }
 
+    /**
+     * Processa arquivo OFX e salva as transações no servidor em uma única etapa
+     * @param {File} file - Arquivo OFX
+     * @returns {Promise<Object>} Número de transações inseridas e ignoradas
+     */
+    async importOFXFile(file) {
+        try {
+            const formData = new FormData();
+            formData.append('file', file);
+
+            const response = await fetch(`${this.baseUrl}/api/import-ofx`, {
+                method: 'POST',
+                body: formData
+            });
+
+            const result = await response.json();
+
+            if (!result.success) {
+                throw new Error(result.error);
+            }
+
+            return result.data;
+        } catch (error) {
+            console.error('Erro ao importar arquivo OFX:', error);
+            throw error;
+        }
+    }
+
     /**
      * Busca transações com filtros opcionais
      * @param {Object} filters - Filtros de busca
@@ -1,28 +1,365 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import gzip
+import hmac
+import math
 import os
 import tempfile
+import time
+import uuid
+from functools import wraps
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
+from config import config
+from event_hub import EventHub
+from metrics import REGISTRY
 from ofx_parser import OFXParser
-from transaction_manager import TransactionManager
+from rate_limiter import RateLimiter
+from request_profiler import RequestProfiler
+from response_cache import ResponseCache
+from statement_importer import StatementImporter, CSV_EXTENSIONS, XLSX_EXTENSIONS
+from transaction_manager import TransactionManager, EXPORT_FORMATS, frame_to_columns
 import json
-from datetime import datetime
+import pandas as pd
+from datetime import datetime, date
+
+REQUEST_SECONDS = REGISTRY.histogram('http_request_duration_seconds', 'Duração das requisições, por endpoint e método')
+REQUESTS = REGISTRY.counter('http_requests_total', 'Requisições atendidas, por endpoint, método e status')
+RESPONSE_BYTES = REGISTRY.counter('http_response_bytes_total', 'Bytes enviados no corpo das respostas (sem streaming), por endpoint')
+SERIALIZE_SECONDS = REGISTRY.histogram('json_serialization_seconds', 'Tempo de serialização das respostas JSON')
+COMPRESS_SECONDS = REGISTRY.histogram('gzip_compression_seconds', 'Tempo de compressão gzip das respostas')
+RATE_LIMITED = REGISTRY.counter('rate_limited_requests_total', 'Requisições recusadas com 429, por orçamento')
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Serialização JSON padrão do Flask (jsonify), medida em json_serialization_seconds"""
+    
+    def dumps(self, obj, **kwargs):
+        with SERIALIZE_SECONDS.time():
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 CORS(app)  # Permite requisições de outros domínios
 
 # Configurações
+app.config.from_object(config[os.environ.get('FLASK_ENV', 'default')])
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['OFX_PARSE_WORKERS'] = int(os.environ.get('OFX_PARSE_WORKERS', os.cpu_count() or 1))
+app.config['USE_CATEGORIZER'] = os.environ.get('USE_CATEGORIZER', 'false').lower() == 'true'
+# Compressão gzip de respostas JSON: tamanho mínimo, nível e memória para as respostas já comprimidas
+app.config['GZIP_MIN_SIZE'] = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+app.config['GZIP_LEVEL'] = int(os.environ.get('GZIP_LEVEL', 6))
+app.config['RESPONSE_CACHE_BYTES'] = int(os.environ.get('RESPONSE_CACHE_BYTES', 32 * 1024 * 1024))
+# Atrás de proxies, o rate limiting precisa do IP do cliente e não o do proxy
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
 ALLOWED_EXTENSIONS = {'ofx'}
+# Prefixo dos ETags: muda a cada inicialização, já que a versão dos dados recomeça do zero
+ETAG_PREFIX = uuid.uuid4().hex[:8]
+# Endpoints que usam o orçamento de rate limiting dos caros; os demais usam o padrão
+EXPENSIVE_ENDPOINTS = {'process_ofx', 'import_ofx', 'import_ofx_batch', 'import_statement',
+                       'add_transactions_bulk', 'export_transactions', 'generate_report'}
+# Sondas de monitoramento não entram no limite
+RATELIMIT_EXEMPT_ENDPOINTS = {'health_check', 'metrics'}
 
 # Inicializar o gerenciador de transações
-transaction_manager = TransactionManager()
+transaction_manager = TransactionManager(use_categorizer=app.config['USE_CATEGORIZER'])
+statement_importer = StatementImporter()
+
+# Eventos de novas transações para os clientes conectados em /api/events
+# Cada conexão ocupa uma thread do gunicorn: EVENTS_MAX_SUBSCRIBERS deve ficar abaixo de --threads
+event_hub = EventHub(max_queue=int(os.environ.get('EVENTS_MAX_QUEUE', 100)),
+                     max_subscribers=int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', 0)) or None)
+transaction_manager.add_listener(event_hub.publish)
+
+# Respostas comprimidas das consultas com ETag, reaproveitadas enquanto os dados não mudam
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_BYTES'])
+
+# Rate limiting por cliente (ver config.Config.RATELIMIT_ENABLED); só há armazenamento em memória
+if app.config['RATELIMIT_ENABLED'] and 'TRUSTED_PROXIES' not in os.environ:
+    print("Rate limiting ligado sem TRUSTED_PROXIES: atrás de um proxy, todos os clientes "
+          "dividem o mesmo limite (defina TRUSTED_PROXIES, ou 0 sem proxy)")
+if app.config['RATELIMIT_ENABLED'] and app.config['RATELIMIT_STORAGE_URL'] != 'memory://':
+    print(f"RATELIMIT_STORAGE_URL {app.config['RATELIMIT_STORAGE_URL']} não suportado; usando memória do processo")
+rate_limiters = {
+    'default': RateLimiter(app.config['RATELIMIT_PER_MINUTE'] / 60, app.config['RATELIMIT_BURST']),
+    'expensive': RateLimiter(app.config['RATELIMIT_EXPENSIVE_PER_MINUTE'] / 60,
+                             app.config['RATELIMIT_EXPENSIVE_BURST'])
+}
+
+# Perfis de requisições (ver config.Config.PROFILING_ENABLED)
+profiler = RequestProfiler(app.config['PROFILING_SAMPLE_RATE'], app.config['PROFILING_TOP_N'],
+                           app.config['PROFILING_MAX_ENTRIES'])
+
+REGISTRY.add_collector('counter', 'response_cache_requests_total',
+                       'Consultas ao cache de respostas comprimidas, por resultado (hit ou miss)',
+                       lambda: [({'result': 'hit'}, response_cache.hits), ({'result': 'miss'}, response_cache.misses)])
+REGISTRY.add_collector('gauge', 'response_cache_bytes', 'Bytes ocupados pelo cache de respostas comprimidas',
+                       lambda: [({}, response_cache.size)])
+REGISTRY.add_collector('gauge', 'events_subscribers', 'Clientes conectados em /api/events',
+                       lambda: [({}, event_hub.subscriber_count)])
+REGISTRY.add_collector('gauge', 'data_version', 'Versão dos dados (ver TransactionManager.data_version)',
+                       lambda: [({}, transaction_manager.data_version)])
 
 def allowed_file(filename):
     """Verifica se o arquivo tem extensão permitida"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def validate_ofx_upload():
+    """Valida o arquivo OFX enviado no campo 'file' e retorna a resposta de erro, se houver"""
+    # Verificar se arquivo foi enviado
+    if 'file' not in request.files:
+        return jsonify({
+            'success': False,
+            'error': 'Nenhum arquivo enviado'
+        }), 400
+    
+    file = request.files['file']
+    
+    # Verificar se arquivo foi selecionado
+    if file.filename == '':
+        return jsonify({
+            'success': False,
+            'error': 'Nenhum arquivo selecionado'
+        }), 400
+    
+    # Verificar extensão
+    if not allowed_file(file.filename):
+        return jsonify({
+            'success': False,
+            'error': 'Tipo de arquivo não permitido. Use apenas arquivos .ofx'
+        }), 400
+    
+    return None
+
+def save_temp_upload(file, suffix='.ofx'):
+    """Salva o arquivo enviado em um arquivo temporário e retorna o caminho"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        file.save(temp_file.name)
+        return temp_file.name
+
+def has_admin_token():
+    """Indica se a requisição traz o token de administração; sem ADMIN_TOKEN definido, nunca"""
+    token = app.config.get('ADMIN_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+def validate_admin_token():
+    """Confere o token de administração (X-Admin-Token) e retorna a resposta de erro, se houver"""
+    if not app.config.get('ADMIN_TOKEN'):
+        return jsonify({
+            'success': False,
+            'error': 'Endpoints de administração desabilitados: defina ADMIN_TOKEN'
+        }), 403
+    
+    if not has_admin_token():
+        return jsonify({
+            'success': False,
+            'error': 'Token de administração inválido'
+        }), 401
+    
+    return None
+
+def accepts_gzip():
+    """Indica se o cliente aceita respostas com Content-Encoding gzip"""
+    return request.accept_encodings.quality('gzip') > 0
+
+def conditional_get(daily=False):
+    """
+    Marca a resposta com um ETag derivado da versão dos dados e responde
+    304 Not Modified, sem executar o endpoint, quando o cliente envia esse
+    mesmo ETag em If-None-Match
+    
+    Se o cliente aceita gzip e a mesma consulta já foi comprimida nessa
+    versão dos dados, o corpo comprimido vem de response_cache, também sem
+    executar o endpoint.
+    
+    Args:
+        daily: inclui a data atual no ETag (respostas que dependem do dia, como o dashboard)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = f'{ETAG_PREFIX}-{transaction_manager.data_version}'
+            if daily:
+                etag += f'-{date.today().toordinal()}'
+            
+            # O ETag da versão comprimida é o mesmo com o sufixo -gz (ver compress_response)
+            matched = [tag for tag in (etag, etag + '-gz') if request.if_none_match.contains(tag)]
+            cached = None
+            if not matched and accepts_gzip():
+                cached = response_cache.get((request.full_path, etag))
+            
+            if matched:
+                response = Response(status=304)
+                etag = matched[0]
+            elif cached is not None:
+                response = Response(cached, mimetype='application/json')
+                response.headers['Content-Encoding'] = 'gzip'
+                response.vary.add('Accept-Encoding')
+                etag += '-gz'
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def enforce_rate_limit():
+    """
+    Recusa com 429 e Retry-After as requisições de clientes que esgotaram o
+    orçamento do endpoint, se o rate limiting estiver habilitado
+    
+    O cliente é identificado pelo IP de origem; atrás de um proxy reverso,
+    configure o ProxyFix do werkzeug para que seja o IP real.
+    """
+    if not app.config['RATELIMIT_ENABLED'] or request.method == 'OPTIONS' or \
+            request.endpoint in RATELIMIT_EXEMPT_ENDPOINTS:
+        return None
+    
+    budget = 'expensive' if request.endpoint in EXPENSIVE_ENDPOINTS else 'default'
+    wait = rate_limiters[budget].acquire(request.remote_addr)
+    if not wait:
+        return None
+    
+    RATE_LIMITED.inc(budget=budget)
+    retry_after = math.ceil(wait)
+    response = jsonify({
+        'success': False,
+        'error': f'Limite de requisições excedido. Tente novamente em {retry_after} segundo(s)'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.before_request
+def start_profile():
+    """
+    Inicia o cProfile nas requisições escolhidas, se o perfil estiver habilitado
+    
+    O cabeçalho X-Profile só é atendido junto com um X-Admin-Token válido.
+    """
+    if app.config['PROFILING_ENABLED']:
+        requested = 'X-Profile' in request.headers and has_admin_token()
+        if profiler.should_profile(requested):
+            g.profile = profiler.start()
+
+@app.after_request
+def finish_profile(response):
+    """
+    Encerra o perfil da requisição, se houver, e informa o id em X-Profile-Id
+    
+    Registrado antes dos demais after_request, roda por último e inclui o
+    tempo deles.
+    """
+    profile = g.pop('profile', None)
+    if profile is not None:
+        entry = profiler.finish(profile, request.method, request.full_path, response.status_code)
+        response.headers['X-Profile-Id'] = str(entry['id'])
+    return response
+
+@app.teardown_request
+def discard_profile(exception):
+    """Libera o perfil de requisições que terminaram sem passar por finish_profile"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.discard(profile)
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Registra duração, status e tamanho de cada requisição por endpoint
+    
+    Registrado antes de compress_response, roda depois dele (o Flask executa
+    os after_request na ordem inversa), então a duração inclui a compressão.
+    Em respostas em streaming, mede só até o início do envio.
+    """
+    endpoint = request.url_rule.rule if request.url_rule else 'desconhecido'
+    start = g.get('request_start')
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, method=request.method)
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    if not response.is_streamed and response.content_length:
+        RESPONSE_BYTES.inc(response.content_length, endpoint=endpoint)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    Comprime com gzip as respostas JSON a partir de GZIP_MIN_SIZE bytes,
+    quando o cliente aceita; respostas com ETag ficam em response_cache
+    """
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed or \
+            response.mimetype != 'application/json' or 'Content-Encoding' in response.headers:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if not accepts_gzip() or len(data) < app.config['GZIP_MIN_SIZE']:
+        return response
+    
+    with COMPRESS_SECONDS.time():
+        data = gzip.compress(data, app.config['GZIP_LEVEL'])
+    response.set_data(data)
+    response.headers['Content-Encoding'] = 'gzip'
+    
+    # A versão comprimida tem ETag próprio, derivado do da versão sem compressão
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response_cache.put((request.full_path, etag), data)
+        response.set_etag(etag + '-gz')
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas do processo no formato texto do Prometheus"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Lista os perfis de requisições guardados, do mais recente para o mais antigo"""
+    error_response = validate_admin_token()
+    if error_response:
+        return error_response
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': app.config['PROFILING_ENABLED'],
+            'sample_rate': profiler.sample_rate,
+            'profiles': profiler.entries()
+        }
+    })
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Retorna um perfil com as funções de maior tempo acumulado"""
+    error_response = validate_admin_token()
+    if error_response:
+        return error_response
+    
+    entry = profiler.get(profile_id)
+    if entry is None:
+        return jsonify({
+            'success': False,
+            'error': 'Perfil não encontrado'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': entry
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint de verificação de saúde da API"""
@@ -41,33 +378,12 @@ def process_ofx():
         JSON com transações processadas e estatísticas
     """
     try:
-        # Verificar se arquivo foi enviado
-        if 'file' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'Nenhum arquivo enviado'
-            }), 400
-        
-        file = request.files['file']
-        
-        # Verificar se arquivo foi selecionado
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'Nenhum arquivo selecionado'
-            }), 400
-        
-        # Verificar extensão
-        if not allowed_file(file.filename):
-            return jsonify({
-                'success': False,
-                'error': 'Tipo de arquivo não permitido. Use apenas arquivos .ofx'
-            }), 400
+        error_response = validate_ofx_upload()
+        if error_response:
+            return error_response
         
         # Salvar arquivo temporariamente
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.ofx') as temp_file:
-            file.save(temp_file.name)
-            temp_file_path = temp_file.name
+        temp_file_path = save_temp_upload(request.files['file'])
         
         try:
             # Processar arquivo OFX
@@ -120,7 +436,160 @@ def process_ofx():
             'error': f'Erro ao processar arquivo: {str(e)}'
         }), 500
 
+@app.route('/api/import-ofx', methods=['POST'])
+def import_ofx():
+    """
+    Processa arquivo OFX e salva as transações em uma única etapa
+    
+    Transações já importadas (mesmo FITID ou, sem FITID, mesma data, valor
+    e descrição) são ignoradas.
+    
+    Form Parameters:
+        - skip_duplicates: se 'true', também ignora possíveis duplicatas
+          (mesmo valor, data próxima e descrição parecida)
+    
+    Returns:
+        JSON com o número de transações inseridas e ignoradas e as possíveis duplicatas
+    """
+    try:
+        error_response = validate_ofx_upload()
+        if error_response:
+            return error_response
+        
+        temp_file_path = save_temp_upload(request.files['file'])
+        
+        try:
+            # Caminho colunar: os DataFrames do parser vão direto para o gerenciador
+            parser = OFXParser()
+            statements = parser.parse_ofx_statements(temp_file_path)
+            transactions = pd.concat([st['transactions'] for st in statements], ignore_index=True) \
+                if statements else pd.DataFrame()
+            
+            if transactions.empty:
+                return jsonify({
+                    'success': False,
+                    'error': 'Nenhuma transação encontrada no arquivo OFX'
+                }), 400
+            
+            skip_duplicates = request.form.get('skip_duplicates', 'false').lower() == 'true'
+            result = transaction_manager.import_frame(
+                transactions, skip_possible_duplicates=skip_duplicates
+            )
+            transaction_manager.update_accounts(statements)
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'accounts': [
+                        {'conta': st['conta'], 'tipo_conta': st['tipo_conta'], 'total': len(st['transactions'])}
+                        for st in statements
+                    ],
+                    'total_transactions': len(transactions),
+                    'inserted': result['inserted'],
+                    'skipped': result['skipped'],
+                    'possible_duplicates': result['possible_duplicates']
+                },
+                'message': f"{result['inserted']} transações importadas, {result['skipped']} já existentes ignoradas"
+            })
+            
+        finally:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+                
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao importar arquivo: {str(e)}'
+        }), 500
+
+@app.route('/api/import-statement', methods=['POST'])
+def import_statement():
+    """
+    Importa um extrato CSV ou XLSX usando um perfil de mapeamento de colunas
+    
+    O arquivo é lido em blocos e cada bloco segue para o mesmo caminho de
+    inserção em lote do OFX, com a mesma deduplicação.
+    
+    Form Parameters:
+        - profile: nome do perfil de colunas (padrão: 'padrao'; ver /api/import-profiles)
+        - conta: conta atribuída às transações (opcional)
+        - skip_duplicates: se 'true', também ignora possíveis duplicatas
+    """
+    try:
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum arquivo enviado'
+            }), 400
+        
+        file = request.files['file']
+        extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+        if extension not in CSV_EXTENSIONS | XLSX_EXTENSIONS:
+            return jsonify({
+                'success': False,
+                'error': 'Tipo de arquivo não permitido. Use arquivos .csv ou .xlsx'
+            }), 400
+        
+        profile = request.form.get('profile', 'padrao')
+        if profile not in statement_importer.get_profiles():
+            return jsonify({
+                'success': False,
+                'error': f'Perfil de importação desconhecido: {profile}'
+            }), 400
+        
+        temp_file_path = save_temp_upload(file, suffix='.' + extension)
+        
+        try:
+            skip_duplicates = request.form.get('skip_duplicates', 'false').lower() == 'true'
+            total = 0
+            inserted = 0
+            skipped = 0
+            possible_duplicates = []
+            
+            for frame in statement_importer.iter_frames(temp_file_path, profile, request.form.get('conta') or None):
+                result = transaction_manager.import_frame(frame, skip_possible_duplicates=skip_duplicates)
+                total += len(frame)
+                inserted += result['inserted']
+                skipped += result['skipped']
+                possible_duplicates.extend(result['possible_duplicates'])
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'total_transactions': total,
+                    'inserted': inserted,
+                    'skipped': skipped,
+                    'possible_duplicates': possible_duplicates
+                },
+                'message': f"{inserted} transações importadas, {skipped} já existentes ignoradas"
+            })
+            
+        finally:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao importar extrato: {str(e)}'
+        }), 500
+
+@app.route('/api/import-profiles', methods=['GET'])
+def get_import_profiles():
+    """Retorna os perfis de mapeamento de colunas para CSV/XLSX"""
+    return jsonify({
+        'success': True,
+        'data': statement_importer.get_profiles()
+    })
+
 @app.route('/api/transactions', methods=['GET'])
+@conditional_get()
 def get_transactions():
     """
     Retorna transações com filtros opcionais
@@ -130,8 +599,11 @@ def get_transactions():
         - data_fim: Data de fim (YYYY-MM-DD)
         - categoria: Filtro por categoria
         - tipo: Filtro por tipo (Receita/Despesa)
+        - conta: Filtro por conta (ver /api/accounts)
+        - q: Busca por palavras na descrição (sem diferenciar acentos e maiúsculas)
         - limit: Limite de registros (padrão: 100)
         - offset: Offset para paginação (padrão: 0)
+        - format: 'columns' para uma lista por coluna (ver frame_to_columns) em vez de uma lista de transações
     """
     try:
         # Parâmetros de filtro
@@ -139,6 +611,8 @@ def get_transactions():
         data_fim = request.args.get('data_fim')
         categoria = request.args.get('categoria')
         tipo = request.args.get('tipo')
+        conta = request.args.get('conta')
+        q = request.args.get('q')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
         
@@ -150,23 +624,37 @@ def get_transactions():
         
         # Buscar transações filtradas
         filtered_transactions = transaction_manager.get_filtered_transactions(
-            data_inicio, data_fim, categoria, tipo
+            data_inicio, data_fim, categoria, tipo, conta, q
         )
         
         # Aplicar paginação
         total_count = len(filtered_transactions)
         paginated_transactions = filtered_transactions.iloc[offset:offset+limit]
+        pagination = {
+            'total': total_count,
+            'limit': limit,
+            'offset': offset,
+            'has_more': offset + limit < total_count
+        }
+        
+        if request.args.get('format') == 'columns':
+            # Serializado direto das colunas, sem passar por um dict por transação
+            with SERIALIZE_SECONDS.time():
+                body = json.dumps({
+                    'success': True,
+                    'data': {
+                        'format': 'columns',
+                        'transactions': frame_to_columns(paginated_transactions),
+                        'pagination': pagination
+                    }
+                }, ensure_ascii=False, separators=(',', ':'))
+            return Response(body, mimetype='application/json')
         
         return jsonify({
             'success': True,
             'data': {
                 'transactions': paginated_transactions.to_dict('records'),
-                'pagination': {
-                    'total': total_count,
-                    'limit': limit,
-                    'offset': offset,
-                    'has_more': offset + limit < total_count
-                }
+                'pagination': pagination
             }
         })
         
@@ -255,7 +743,221 @@ def add_transactions_bulk():
             'error': f'Erro ao adicionar transações: {str(e)}'
         }), 500
 
+@app.route('/api/import-ofx/batch', methods=['POST'])
+def import_ofx_batch():
+    """
+    Processa vários arquivos OFX em paralelo e salva as transações
+    
+    Os arquivos são distribuídos entre processos e as transações são salvas
+    na ordem de envio, com a mesma deduplicação de /api/import-ofx. Um arquivo
+    com erro não interrompe os demais: o erro é informado no resultado dele.
+    
+    Form Parameters:
+        - files: arquivos OFX (campo repetido)
+        - skip_duplicates: se 'true', também ignora possíveis duplicatas
+    
+    Returns:
+        JSON com o resultado de cada arquivo e o total inserido e ignorado
+    """
+    try:
+        files = request.files.getlist('files')
+        
+        if not files or all(f.filename == '' for f in files):
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum arquivo enviado'
+            }), 400
+        
+        invalid = [f.filename for f in files if not allowed_file(f.filename)]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'error': f'Tipo de arquivo não permitido: {", ".join(invalid)}. Use apenas arquivos .ofx'
+            }), 400
+        
+        temp_file_paths = [save_temp_upload(f) for f in files]
+        
+        try:
+            parser = OFXParser()
+            parsed = parser.parse_ofx_files(temp_file_paths, workers=app.config['OFX_PARSE_WORKERS'])
+            
+            statements = parsed['statements']
+            transactions = pd.concat([st['transactions'] for st in statements], ignore_index=True) \
+                if statements else pd.DataFrame()
+            
+            file_results = []
+            for upload, file_result in zip(files, parsed['files']):
+                file_results.append({
+                    'arquivo': upload.filename,
+                    'total': file_result['total'],
+                    'erro': file_result['erro']
+                })
+            
+            # Como em /api/import-ofx: sem nenhuma transação, a importação falha
+            if transactions.empty:
+                return jsonify({
+                    'success': False,
+                    'error': 'Nenhuma transação encontrada nos arquivos OFX',
+                    'data': {'files': file_results}
+                }), 400
+            
+            skip_duplicates = request.form.get('skip_duplicates', 'false').lower() == 'true'
+            result = transaction_manager.import_frame(
+                transactions, skip_possible_duplicates=skip_duplicates
+            )
+            transaction_manager.update_accounts(statements)
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'files': file_results,
+                    'total_transactions': len(transactions),
+                    'inserted': result['inserted'],
+                    'skipped': result['skipped'],
+                    'possible_duplicates': result['possible_duplicates']
+                },
+                'message': f"{result['inserted']} transações importadas de {len(files)} arquivos"
+            })
+            
+        finally:
+            for temp_file_path in temp_file_paths:
+                if os.path.exists(temp_file_path):
+                    os.unlink(temp_file_path)
+                
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao importar arquivos: {str(e)}'
+        }), 500
+
+@app.route('/api/duplicates', methods=['GET'])
+@conditional_get()
+def get_duplicates():
+    """
+    Audita todas as transações em busca de possíveis duplicatas
+    
+    Query Parameters:
+        - window_days: Diferença máxima de dias entre as datas (padrão: 3)
+        - min_similarity: Similaridade mínima das descrições, de 0 a 1 (padrão: 0.6)
+        - limit: Limite de pares retornados (padrão: 100)
+    """
+    try:
+        window_days = int(request.args.get('window_days', 3))
+        min_similarity = float(request.args.get('min_similarity', 0.6))
+        limit = int(request.args.get('limit', 100))
+        
+        duplicates = transaction_manager.find_duplicates(window_days, min_similarity)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'duplicates': duplicates.head(limit).to_dict('records'),
+                'total': len(duplicates)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao buscar duplicatas: {str(e)}'
+        }), 500
+
+@app.route('/api/export', methods=['GET'])
+def export_transactions():
+    """
+    Exporta transações em CSV, JSON ou Parquet, enviando o arquivo em blocos
+    
+    Query Parameters:
+        - format: csv, json, columns ou parquet (padrão: csv)
+        - data_inicio, data_fim, categoria, tipo, conta, q: mesmos filtros de /api/transactions
+    """
+    try:
+        export_format = request.args.get('format', 'csv')
+        data_inicio = request.args.get('data_inicio')
+        data_fim = request.args.get('data_fim')
+        
+        if data_inicio:
+            data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+        if data_fim:
+            data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
+        
+        chunks = transaction_manager.iter_export(
+            export_format, data_inicio, data_fim,
+            request.args.get('categoria'), request.args.get('tipo'), request.args.get('conta'),
+            q=request.args.get('q')
+        )
+        
+        extension = 'jsonl' if export_format == 'columns' else export_format
+        filename = f"transacoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao exportar transações: {str(e)}'
+        }), 500
+
+@app.route('/api/aggregate', methods=['GET'])
+@conditional_get()
+def aggregate_transactions():
+    """
+    Agrega valores das transações no servidor
+    
+    Query Parameters:
+        - group_by: dimensões separadas por vírgula (day, week, month, categoria, tipo, origem, conta)
+        - metrics: métricas separadas por vírgula (sum, count, avg, min, max; padrão: sum,count)
+        - data_inicio, data_fim, categoria, tipo, conta: mesmos filtros de /api/transactions
+    """
+    try:
+        group_by = [d for d in request.args.get('group_by', '').split(',') if d]
+        metrics = [m for m in request.args.get('metrics', 'sum,count').split(',') if m]
+        data_inicio = request.args.get('data_inicio')
+        data_fim = request.args.get('data_fim')
+        
+        if data_inicio:
+            data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').date()
+        if data_fim:
+            data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
+        
+        rows, source = transaction_manager.aggregate(
+            group_by, metrics, data_inicio, data_fim,
+            request.args.get('categoria'), request.args.get('tipo'), request.args.get('conta')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'group_by': group_by,
+                'metrics': metrics,
+                'rows': rows,
+                'source': source
+            }
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao agregar transações: {str(e)}'
+        }), 500
+
 @app.route('/api/dashboard', methods=['GET'])
+@conditional_get(daily=True)
 def get_dashboard_data():
     """
     Retorna dados para o dashboard
@@ -279,7 +981,86 @@ def get_dashboard_data():
             'error': f'Erro ao buscar dados do dashboard: {str(e)}'
         }), 500
 
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Stream Server-Sent Events com as alterações dos dados
+    
+    Eventos:
+        - transactions: transações inseridas, saldo e total atualizados e variações do mês
+        - reset: dados substituídos por um backup, com os valores do dashboard
+        - resync: o cliente ficou para trás e deve recarregar /api/dashboard
+    
+    Com o limite de conexões (EVENTS_MAX_SUBSCRIBERS) atingido, responde 503
+    e o cliente deve voltar a consultar /api/dashboard.
+    """
+    if event_hub.is_full:
+        response = jsonify({
+            'success': False,
+            'error': 'Limite de conexões de eventos atingido, tente novamente mais tarde'
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    return Response(
+        stream_with_context(event_hub.stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/accounts', methods=['GET'])
+@conditional_get()
+def get_accounts():
+    """
+    Retorna as contas conhecidas, com o saldo do último extrato importado
+    e o saldo calculado pelas transações salvas
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'data': transaction_manager.get_accounts()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao buscar contas: {str(e)}'
+        }), 500
+
+@app.route('/api/categorize', methods=['POST'])
+def categorize_descriptions():
+    """
+    Sugere categorias para descrições, sem salvar transações
+    
+    Usa as regras de categorização e, com USE_CATEGORIZER=true, o categorizador
+    treinado com o histórico para o que as regras não cobrem.
+    
+    Body:
+        JSON com 'descricoes' (lista de textos)
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('descricoes'), list):
+            return jsonify({
+                'success': False,
+                'error': 'Lista de descrições não fornecida'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': transaction_manager.suggest_categories(data['descricoes'])
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erro ao categorizar descrições: {str(e)}'
+        }), 500
+
 @app.route('/api/categories', methods=['GET'])
+@conditional_get()
 def get_categories():
     """
     Retorna lista de categorias disponíveis
@@ -350,7 +1131,8 @@ def generate_report():
         if data_fim:
             data_fim = datetime.strptime(data_fim, '%Y-%m-%d').date()
         
-        report_data = transaction_manager.generate_report(periodo, data_inicio, data_fim)
+        # A API não devolve os gráficos: sem eles o plotly nem é importado
+        report_data = transaction_manager.generate_report(periodo, data_inicio, data_fim, charts=False)
         
         if not report_data:
             return jsonify({
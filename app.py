@@ -1,9 +1,6 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import json
 import os
 from ofx_parser import OFXParser
 from transaction_manager import TransactionManager
@@ -216,9 +213,11 @@ elif page == "📋 Transações":
     with col4:
         tipo_filtro = st.selectbox("Tipo", ["Todos", "Receita", "Despesa"])
     
+    busca = st.text_input("Buscar na descrição", placeholder="Ex.: uber, mercado")
+    
     # Aplicar filtros
     filtered_transactions = transaction_manager.get_filtered_transactions(
-        data_inicio, data_fim, categoria_filtro, tipo_filtro
+        data_inicio, data_fim, categoria_filtro, tipo_filtro, q=busca
     )
     
     if not filtered_transactions.empty:
@@ -249,7 +248,10 @@ elif page == "📋 Transações":
         
         with col1:
             if st.button("📥 Exportar CSV"):
-                csv = filtered_transactions.to_csv(index=False)
+                # O download do Streamlit exige o conteúdo inteiro; o CSV sai do mesmo pipeline de /api/export
+                csv = b''.join(transaction_manager.iter_export(
+                    'csv', data_inicio, data_fim, categoria_filtro, tipo_filtro, q=busca
+                ))
                 st.download_button(
                     label="💾 Download CSV",
                     data=csv,
@@ -397,10 +399,10 @@ elif page == "⚙️ Configurações":
     
     with col1:
         if st.button("📥 Fazer Backup"):
-            backup_data = transaction_manager.export_data()
+            backup_data = b''.join(transaction_manager.iter_export('json'))
             st.download_button(
                 label="💾 Download Backup",
-                data=json.dumps(backup_data, indent=2),
+                data=backup_data,
                 file_name=f"backup_financeiro_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                 mime="application/json"
             )
@@ -415,9 +417,17 @@ elif page == "⚙️ Configurações":
         if uploaded_backup:
             if st.button("🔄 Restaurar Dados"):
                 try:
-                    backup_data = json.load(uploaded_backup)
-                    transaction_manager.import_data(backup_data)
-                    st.success("Backup restaurado com sucesso!")
+                    # Leitura em lotes: o backup não é carregado inteiro na memória
+                    progress_bar = st.progress(0.0)
+                    total_size = uploaded_backup.size or 1
+                    restored = transaction_manager.import_backup(
+                        uploaded_backup,
+                        progress=lambda count, read: progress_bar.progress(
+                            min(read / total_size, 1.0), text=f"{count} transações restauradas"
+                        )
+                    )
+                    progress_bar.empty()
+                    st.success(f"Backup restaurado com sucesso! ({restored} transações)")
                 except Exception as e:
                     st.error(f"Erro ao restaurar backup: {str(e)}")
 
@@ -0,0 +1,134 @@
+import codecs
+import json
+
+class BackupReader:
+    """
+    Leitor incremental de backups JSON (ver TransactionManager.export_data)
+    
+    O arquivo é lido em blocos e decodificado aos poucos com
+    JSONDecoder.raw_decode. As transações são entregues em lotes de
+    `chunk_size`, sem nunca manter o texto inteiro nem a lista completa em
+    memória; as demais chaves (categorias, regras, contas) são pequenas e são
+    decodificadas de uma vez.
+    
+    Nenhum valor pode passar de `max_value_size` caracteres: um valor truncado
+    ou corrompido gera erro assim que passa do limite, em vez de acumular o
+    resto do arquivo no buffer.
+    """
+    
+    def __init__(self, file, chunk_size=5000, block_size=1 << 16, max_value_size=1 << 24):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.max_value_size = max_value_size
+        self.bytes_read = 0
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self):
+        """Lê mais um bloco do arquivo; retorna False no fim do arquivo"""
+        if self._eof:
+            return False
+        
+        block = self.file.read(self.block_size)
+        if not block:
+            self._eof = True
+            self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(b'', final=True)
+            self._pos = 0
+            return False
+        
+        if isinstance(block, bytes):
+            self.bytes_read += len(block)
+            block = self._text_decoder.decode(block)
+        else:
+            self.bytes_read += len(block.encode('utf-8'))
+        
+        # Descarta o que já foi consumido só ao reabastecer, e não a cada valor lido
+        self._buffer = self._buffer[self._pos:] + block
+        self._pos = 0
+        return True
+    
+    def _skip_whitespace(self):
+        """Avança até o próximo caractere significativo e o retorna ('' no fim)"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+    
+    def _expect(self, *chars):
+        """Consome um dos caracteres esperados e o retorna"""
+        char = self._skip_whitespace()
+        if char not in chars:
+            raise ValueError(f"Backup inválido: esperado {' ou '.join(chars)} na posição {self.bytes_read}")
+        self._pos += 1
+        return char
+    
+    def _value(self):
+        """Decodifica o próximo valor JSON completo"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if len(self._buffer) - self._pos > self.max_value_size:
+                raise ValueError(f"Backup inválido: valor com mais de {self.max_value_size} caracteres "
+                                 f"na posição {self.bytes_read}")
+            if not self._fill():
+                value, self._pos = self._decoder.raw_decode(self._buffer, self._pos)
+                return value
+    
+    def _array_items(self):
+        """Percorre os elementos de um array JSON um por vez"""
+        self._expect('[')
+        if self._skip_whitespace() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',', ']') == ']':
+                return
+    
+    def __iter__(self):
+        """
+        Percorre o backup
+        
+        Yields:
+            tuplas (chave, valor); para 'transactions', um lote (lista) por vez
+        """
+        self._expect('{')
+        if self._skip_whitespace() == '}':
+            return
+        
+        while True:
+            key = self._value()
+            self._expect(':')
+            
+            if key == 'transactions':
+                chunk = []
+                chunks = 0
+                for transaction in self._array_items():
+                    chunk.append(transaction)
+                    if len(chunk) >= self.chunk_size:
+                        yield key, chunk
+                        chunks += 1
+                        chunk = []
+                # Um array vazio ainda gera um lote, para indicar que as transações existem no backup
+                if chunk or not chunks:
+                    yield key, chunk
+            else:
+                yield key, self._value()
+            
+            if self._expect(',', '}') == '}':
+                return
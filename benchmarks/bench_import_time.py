@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de importação (cold start) da API
+
+Importa o módulo (api_server por padrão) em processos novos, com
+`python -X importtime`, e mostra o tempo total, os módulos mais caros e se
+algum módulo pesado que só deveria carregar sob demanda (plotly, openpyxl,
+pyarrow) foi importado. Termina com código 1 se o tempo passar de --target-ms
+ou se um módulo proibido aparecer, para uso em CI.
+
+Uso:
+    python benchmarks/bench_import_time.py [--module api_server] [--target-ms 1000] [--runs 5] [--top 15]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências usadas só por gráficos, planilhas e exportação em Parquet
+LAZY_MODULES = ('plotly', 'openpyxl', 'pyarrow')
+
+def import_profile(module, cwd):
+    """
+    Importa o módulo em um processo novo com -X importtime
+    
+    Returns:
+        (lista de (módulo, próprio µs, acumulado µs) na ordem da saída,
+         pacotes presentes em sys.modules no fim)
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # O -X importtime também lista tentativas que falharam (ex.: o pandas
+    # procurando o pyarrow), então os pacotes carregados vêm de sys.modules
+    code = f"import sys, {module}; print(' '.join(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(own), int(cumulative)))
+    return entries, set(result.stdout.split())
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--module', default='api_server')
+    arg_parser.add_argument('--target-ms', type=float, default=1000.0)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    arg_parser.add_argument('--top', type=int, default=15)
+    args = arg_parser.parse_args()
+    
+    # A API cria os arquivos de dados no diretório atual ao ser importada
+    with tempfile.TemporaryDirectory() as temp_dir:
+        profiles = [import_profile(args.module, temp_dir) for _ in range(args.runs)]
+    
+    def total(profile):
+        return next(cumulative for name, _, cumulative in profile[0] if name == args.module)
+    
+    best, modules = min(profiles, key=total)
+    total_ms = total((best, modules)) / 1000
+    print(f"Importação de {args.module}: {total_ms:.1f} ms (melhor de {args.runs}), meta {args.target_ms:.0f} ms")
+    
+    print(f"\n{'Módulo':<40}{'Acumulado ms':>14}{'Próprio ms':>12}")
+    top_level = [entry for entry in best if '.' not in entry[0]]
+    for name, own, cumulative in sorted(top_level, key=lambda entry: entry[2], reverse=True)[:args.top]:
+        print(f"{name:<40}{cumulative / 1000:>14.1f}{own / 1000:>12.1f}")
+    
+    loaded = sorted(modules & set(LAZY_MODULES))
+    failed = False
+    if loaded:
+        print(f"\n⚠️ Módulos que deveriam ser importados sob demanda: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.target_ms:
+        print(f"\n⚠️ Importação acima da meta ({total_ms:.1f} ms > {args.target_ms:.0f} ms)")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\nDentro da meta")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark da conversão de DTPOSTED/TRNAMT: caminho por linha x vetorizado
+
+Compara o antigo caminho por linha (regex + strptime + float por transação) com
+convert_ofx_dates + convert_ofx_amounts aplicados ao lote inteiro, e confere
+que os dois chegam ao mesmo dia e ao mesmo valor em centavos.
+
+Uso:
+    python benchmarks/bench_ofx_conversion.py [--rows 200000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ofx_parser import convert_ofx_amounts, convert_ofx_dates
+
+def generate_raw_fields(rows, seed):
+    """Gera pares (DTPOSTED, TRNAMT) no formato usado pelos bancos"""
+    rng = random.Random(seed)
+    dates = []
+    amounts = []
+    for _ in range(rows):
+        dates.append(
+            f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+            f"{rng.randint(0, 23):02d}{rng.randint(0, 59):02d}{rng.randint(0, 59):02d}[-3:BRT]"
+        )
+        amounts.append(f"{rng.choice(['-', ''])}{rng.randint(0, 5000)}.{rng.randint(0, 99):02d}")
+    return dates, amounts
+
+def parse_ofx_date(date_str):
+    """Conversão por linha usada antes pelo OFXParser (só AAAAMMDDHHMMSS[fuso])"""
+    return datetime.strptime(re.sub(r'\[.*?\]', '', date_str), '%Y%m%d%H%M%S')
+
+def per_row(dates, amounts):
+    """Caminho por linha: regex + strptime e float para cada transação"""
+    parsed_dates = [parse_ofx_date(d) for d in dates]
+    parsed_amounts = [float(a) if a else 0.0 for a in amounts]
+    return parsed_dates, parsed_amounts
+
+def vectorized(dates, amounts):
+    """Caminho em lote: matriz de bytes de largura fixa"""
+    return convert_ofx_dates(dates), convert_ofx_amounts(amounts)[0]
+
+def best_of(function, repeat=3):
+    """Menor tempo de execução entre as repetições, em segundos"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--rows', type=int, default=200000)
+    arg_parser.add_argument('--seed', type=int, default=42)
+    args = arg_parser.parse_args()
+    
+    dates, amounts = generate_raw_fields(args.rows, args.seed)
+    row_time, (row_dates, row_amounts) = best_of(lambda: per_row(dates, amounts))
+    vec_time, (vec_dates, vec_cents) = best_of(lambda: vectorized(dates, amounts))
+    
+    # Mesma data (hora local do extrato) e mesmo valor em centavos nos dois caminhos
+    expected_dates = np.array(row_dates, dtype='datetime64[s]')
+    expected_cents = np.rint(np.array(row_amounts) * 100).astype(np.int64)
+    assert (expected_dates == vec_dates).all(), "datas divergentes"
+    assert (expected_cents == vec_cents).all(), "valores divergentes"
+    
+    print(f"Linhas:          {args.rows}")
+    print(f"Por linha:       {row_time:.3f}s ({args.rows / row_time:,.0f} linhas/s)")
+    print(f"Vetorizado:      {vec_time:.3f}s ({args.rows / vec_time:,.0f} linhas/s)")
+    print(f"Ganho:           {row_time / vec_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo do rate limiting por requisição
+
+Mede RateLimiter.acquire isolado (um cliente e muitos clientes distintos) e o
+tempo de uma requisição barata da API com o rate limiting desligado e ligado
+(com limites altos, para que nenhuma seja recusada). Também confere, com
+várias threads disputando o mesmo cliente, quantas requisições passam em
+relação à rajada configurada.
+
+Uso:
+    python benchmarks/bench_rate_limiter.py [--calls 200000] [--clients 10000] [--requests 2000] [--threads 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter
+
+def best_of(function, repeat=5):
+    """Menor tempo de execução entre as repetições, em segundos"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--calls', type=int, default=200000)
+    arg_parser.add_argument('--clients', type=int, default=10000)
+    arg_parser.add_argument('--requests', type=int, default=2000)
+    arg_parser.add_argument('--threads', type=int, default=8)
+    args = arg_parser.parse_args()
+    
+    limiter = RateLimiter(rate=1e9, burst=1e9)
+    single, _ = best_of(lambda: [limiter.acquire('127.0.0.1') for _ in range(args.calls)])
+    addresses = [f"10.0.{i // 256}.{i % 256}" for i in range(args.clients)]
+    keys = addresses * (args.calls // len(addresses) or 1)
+    many, _ = best_of(lambda: [limiter.acquire(address) for address in keys])
+    print(f"acquire, 1 cliente:        {single / args.calls * 1e9:.0f} ns")
+    print(f"acquire, {args.clients} clientes:  {many / len(keys) * 1e9:.0f} ns")
+    
+    # Rajada disputada: sem reposição relevante, passam ~burst requisições
+    burst = 1000
+    contended = RateLimiter(rate=0.001, burst=burst)
+    accepted = []
+    
+    def hammer():
+        accepted.append(sum(1 for _ in range(burst) if contended.acquire('mesmo-cliente') == 0.0))
+    
+    threads = [threading.Thread(target=hammer) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{args.threads} threads, rajada {burst}: {sum(accepted)} aceitas "
+          f"({args.threads * burst} tentativas)")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        import api_server
+        
+        client = api_server.app.test_client()
+        api_server.rate_limiters['default'] = RateLimiter(rate=1e9, burst=1e9)
+        
+        def requests_with(enabled):
+            api_server.app.config['RATELIMIT_ENABLED'] = enabled
+            return lambda: [client.get('/api/import-profiles') for _ in range(args.requests)]
+        
+        # Rodadas alternadas, para que aquecimento e ruído afetem os dois modos igualmente
+        timings = {False: [], True: []}
+        for _ in range(5):
+            for mode in (False, True):
+                timings[mode].append(best_of(requests_with(mode), repeat=1)[0])
+        disabled, enabled = min(timings[False]), min(timings[True])
+        print(f"Requisição sem limite:     {disabled / args.requests * 1e6:.1f} µs")
+        print(f"Requisição com limite:     {enabled / args.requests * 1e6:.1f} µs "
+              f"({(enabled - disabled) / args.requests * 1e6:+.1f} µs)")
+
+if __name__ == '__main__':
+    main()
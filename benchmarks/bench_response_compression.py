@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark da compressão gzip das respostas JSON da API
+
+Mede, para /api/transactions com uma página de `limit` transações, o tamanho
+do corpo sem compressão e com gzip em cada nível, o tempo de CPU da
+compressão e o tempo da requisição sem compressão, com compressão e com o
+corpo comprimido vindo do cache (ver response_cache.ResponseCache).
+
+Uso:
+    python benchmarks/bench_response_compression.py [--rows 20000] [--limit 1000] [--seed 42]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_server
+from transaction_manager import TransactionManager
+
+DESCRIPTIONS = ['PIX RECEBIDO', 'COMPRA CARTAO MERCADO', 'UBER TRIP', 'PAGAMENTO BOLETO LUZ',
+                'FARMACIA SAO JOAO', 'SALARIO', 'IFOOD', 'NETFLIX.COM', 'POSTO SHELL']
+
+def generate_transactions(rows, seed):
+    """Gera transações do último ano com descrições e valores variados"""
+    rng = random.Random(seed)
+    transactions = []
+    for i in range(rows):
+        transactions.append({
+            'data': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'descricao': f"{rng.choice(DESCRIPTIONS)} {rng.randint(1000, 9999)}",
+            'valor': round(rng.uniform(-500, 500), 2),
+            'fitid': f"{seed}-{i}"
+        })
+    return transactions
+
+def best_of(function, repeat=20):
+    """Menor tempo de execução entre as repetições, em segundos"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--rows', type=int, default=20000)
+    arg_parser.add_argument('--limit', type=int, default=1000)
+    arg_parser.add_argument('--seed', type=int, default=42)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        # Sem arquivamento: as datas geradas podem ser mais antigas que um ano
+        api_server.transaction_manager = TransactionManager('transactions', archive_after_days=None)
+        api_server.transaction_manager.add_transactions(generate_transactions(args.rows, args.seed))
+        client = api_server.app.test_client()
+        url = f'/api/transactions?limit={args.limit}'
+        gzip_headers = {'Accept-Encoding': 'gzip'}
+        
+        body = client.get(url).get_data()
+        print(f"Transações:      {args.rows} (página de {args.limit})")
+        print(f"Sem compressão:  {len(body):,} bytes")
+        for level in (1, 6, 9):
+            compress_time, compressed = best_of(lambda: gzip.compress(body, level))
+            print(f"gzip nível {level}:    {len(compressed):,} bytes "
+                  f"({len(compressed) / len(body):.1%}), {compress_time * 1000:.2f} ms de CPU")
+        
+        identity_time, _ = best_of(lambda: client.get(url))
+        
+        def uncached():
+            api_server.response_cache.clear()
+            return client.get(url, headers=gzip_headers)
+        
+        gzip_time, response = best_of(uncached)
+        assert gzip.decompress(response.get_data()) == body, "corpo comprimido divergente"
+        cached_time, _ = best_of(lambda: client.get(url, headers=gzip_headers))
+        
+        print(f"Requisição sem gzip:       {identity_time * 1000:.2f} ms")
+        print(f"Requisição com gzip:       {gzip_time * 1000:.2f} ms "
+              f"(nível {api_server.app.config['GZIP_LEVEL']})")
+        print(f"Requisição gzip em cache:  {cached_time * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks do OFXParser e do TransactionManager com dados sintéticos
+
+Gera os dados com benchmarks/synthetic.py (mesma semente, mesmos dados) e
+mede parse de OFX 1.x e 2.x, categorização por regras, inserção em lote,
+gravação e leitura do store, consultas filtradas, agregações, relatórios e o
+dashboard. O resultado é salvo em JSON (por padrão em
+benchmarks/results/latest.json) e o comando compare aponta os casos que
+ficaram mais lentos que o limite aceito em relação ao baseline versionado em
+benchmarks/baseline.json. Para atualizar o baseline, rode a suíte com
+--output benchmarks/baseline.json na mesma máquina usada nas comparações.
+
+Uso:
+    python benchmarks/bench_suite.py run [--rows 100000] [--ofx-rows 20000] [--seed 42] [--output atual.json]
+    python benchmarks/bench_suite.py compare [baseline.json] [atual.json] [--threshold 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+from ofx_parser import OFXParser
+from transaction_manager import TransactionManager
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, 'results', 'latest.json')
+
+def best_of(function, repeat=5, setup=None):
+    """
+    Menor tempo de execução entre as repetições, em segundos
+    
+    setup, se informado, roda antes de cada repetição (fora da medição) e o
+    que ele retorna é passado para function.
+    """
+    best = None
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            function(argument)
+        else:
+            function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_suite(rows, ofx_rows, seed, repeat, only=None):
+    """Executa os casos e retorna {nome: {'seconds': ..., 'rows': ...}}"""
+    results = {}
+    
+    def record(name, items, seconds):
+        results[name] = {'seconds': seconds, 'rows': items}
+        print(f"{name:<28}{seconds * 1000:>12.2f} ms{items / seconds:>14,.0f} linhas/s")
+    
+    def measure(name, items, function, setup=None):
+        if not only or name in only:
+            record(name, items, best_of(function, repeat, setup))
+    
+    parser = OFXParser()
+    sgml = synthetic.write_ofx('extrato_v1.ofx', ofx_rows, seed, version=1)
+    xml = synthetic.write_ofx('extrato_v2.ofx', ofx_rows, seed, version=2)
+    measure('parse_ofx_v1_frame', ofx_rows, lambda: parser.parse_ofx_to_frame(sgml))
+    measure('parse_ofx_v2_frame', ofx_rows, lambda: parser.parse_ofx_to_frame(xml))
+    measure('parse_ofx_v1_dicts', ofx_rows, lambda: parser.parse_ofx_file(sgml))
+    
+    # Sem categoria: _prepare_frame aplica as regras linha a linha
+    uncategorized = synthetic.generate_frame(ofx_rows, seed).assign(categoria=None)
+    scratch = TransactionManager('scratch', archive_after_days=None)
+    measure('categorize_rules', ofx_rows, lambda: scratch._prepare_frame(uncategorized))
+    
+    # Cada repetição insere em um store vazio (import_frame: preparo, deduplicação e gravação)
+    statement = parser.parse_ofx_to_frame(sgml)
+    counter = iter(range(repeat * 10))
+    measure('import_frame', ofx_rows,
+            lambda manager: manager.import_frame(statement),
+            setup=lambda: TransactionManager(f'insert_{next(counter)}', archive_after_days=None))
+    
+    # Montagem do store grande: medida uma vez só, e sempre feita (os casos seguintes dependem dela)
+    start = time.perf_counter()
+    manager = synthetic.build_store('transactions', rows, seed)
+    if not only or 'save_store' in only:
+        record('save_store', rows, time.perf_counter() - start)
+    
+    measure('load_store', rows,
+            lambda: TransactionManager('transactions', archive_after_days=None).transactions)
+    
+    manager.get_balance_change()  # resumos dos shards já montados, como num servidor em uso
+    measure('filter_period', rows,
+            lambda: manager.get_filtered_transactions('2024-10-01', '2024-12-31'))
+    measure('filter_category', rows,
+            lambda: manager.get_filtered_transactions(categoria='Alimentação', tipo='Despesa'))
+    measure('filter_account', rows,
+            lambda: manager.get_filtered_transactions(conta='0001-10001'))
+    measure('search_text', rows,
+            lambda: manager.get_filtered_transactions(q='padaria'))
+    measure('aggregate_month_category', rows,
+            lambda: manager.aggregate(['month', 'categoria']))
+    measure('aggregate_week', rows,
+            lambda: manager.aggregate(['week'], data_inicio='2024-01-01', data_fim='2024-12-31'))
+    measure('report_year', rows,
+            lambda: manager.generate_report('Personalizado', '2024-01-01', '2024-12-31'))
+    measure('report_year_totals', rows,
+            lambda: manager.generate_report('Personalizado', '2024-01-01', '2024-12-31', charts=False))
+    
+    def dashboard():
+        manager.get_current_balance()
+        manager.get_balance_change()
+        manager.get_monthly_income()
+        manager.get_monthly_expenses()
+        manager.get_total_transactions()
+        manager.get_recent_transactions(10).to_dict('records')
+    
+    measure('dashboard', rows, dashboard)
+    return results
+
+def compare(baseline, current, threshold):
+    """
+    Compara dois resultados e retorna os nomes dos casos que regrediram
+    
+    Um caso regride quando o tempo atual passa do baseline em mais de
+    `threshold` (0.15 = 15%).
+    """
+    print(f"{'Caso':<28}{'Baseline ms':>13}{'Atual ms':>12}{'Variação':>11}")
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            print(f"{name:<28}{'-':>13}{result['seconds'] * 1000:>12.2f}{'novo':>11}")
+            continue
+        change = result['seconds'] / reference['seconds'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  ⚠️ regressão'
+        print(f"{name:<28}{reference['seconds'] * 1000:>13.2f}{result['seconds'] * 1000:>12.2f}"
+              f"{change:>+11.1%}{flag}")
+    
+    for key in ('rows', 'ofx_rows', 'seed'):
+        if baseline['config'].get(key) != current['config'].get(key):
+            print(f"Atenção: {key} diferente ({baseline['config'].get(key)} x {current['config'].get(key)})")
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    
+    run_command = commands.add_parser('run', help="executa a suíte")
+    run_command.add_argument('--rows', type=int, default=100000, help="transações no store")
+    run_command.add_argument('--ofx-rows', type=int, default=20000, help="transações em cada OFX")
+    run_command.add_argument('--seed', type=int, default=42)
+    run_command.add_argument('--repeat', type=int, default=5)
+    run_command.add_argument('--only', help="casos separados por vírgula")
+    run_command.add_argument('--output', default=DEFAULT_OUTPUT, help="arquivo JSON para o resultado")
+    
+    compare_command = commands.add_parser('compare', help="compara um resultado com o baseline")
+    compare_command.add_argument('baseline', nargs='?', default=BASELINE_FILE)
+    compare_command.add_argument('current', nargs='?', default=DEFAULT_OUTPUT)
+    compare_command.add_argument('--threshold', type=float, default=0.15)
+    args = arg_parser.parse_args()
+    
+    if args.command == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} caso(s) acima de {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("Nenhuma regressão")
+        return
+    
+    output = os.path.abspath(args.output)
+    only = set(args.only.split(',')) if args.only else None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        results = run_suite(args.rows, args.ofx_rows, args.seed, args.repeat, only)
+    
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'rows': args.rows, 'ofx_rows': args.ofx_rows, 'seed': args.seed, 'repeat': args.repeat},
+        'results': results
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultado salvo em {output}")
+
+if __name__ == '__main__':
+    main()
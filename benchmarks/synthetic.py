@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Gerador determinístico de dados sintéticos para benchmarks
+
+Com a mesma semente, gera sempre as mesmas transações, os mesmos arquivos OFX
+(1.x SGML ou 2.x XML) e o mesmo store de transações, de 10 mil a milhões de
+linhas. As datas terminam em uma data de referência fixa (--end), e não no
+dia de hoje, para que os resultados não mudem de um dia para o outro.
+
+Uso:
+    python benchmarks/synthetic.py ofx extrato.ofx [--rows 50000] [--version 1|2] [--seed 42]
+    python benchmarks/synthetic.py store transactions [--rows 1000000] [--accounts 4] [--seed 42]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transaction_manager import COLUMNS, TransactionManager
+
+# Descrições no estilo dos extratos, com a categoria que as regras do parser dão a elas
+DESCRIPTIONS = [
+    ('SUPERMERCADO ABC', 'Alimentação'), ('PADARIA CENTRAL', 'Alimentação'),
+    ('RESTAURANTE SABOR', 'Alimentação'), ('UBER *TRIP', 'Transporte'),
+    ('POSTO SHELL', 'Transporte'), ('NETFLIX.COM', 'Serviços'),
+    ('SPOTIFY', 'Serviços'), ('DROGARIA SAO PAULO', 'Saúde'),
+    ('CINEMA CENTER', 'Lazer'), ('PIX RECEBIDO', 'Transferência'),
+    ('PAGAMENTO BOLETO', 'Transferência'), ('COMPRA CARTAO LOJA', 'Outros'),
+    ('SALARIO EMPRESA', 'Outros'), ('IFOOD', 'Outros')
+]
+
+DEFAULT_END = '2024-12-31'
+
+def generate_frame(rows, seed=42, days=730, accounts=4, end=DEFAULT_END):
+    """
+    DataFrame de transações no formato de COLUMNS, gerado de forma vetorizada
+    
+    As transações se distribuem por `days` dias até `end` e por `accounts`
+    contas (0001-10000 a 0001-1000N). Cerca de 15% são receitas. Os FITIDs
+    são únicos para a semente.
+    """
+    rng = np.random.default_rng(seed)
+    end_day = np.datetime64(end, 'D')
+    dates = np.sort(end_day - rng.integers(0, days, rows).astype('timedelta64[D]'))
+    
+    templates = rng.integers(0, len(DESCRIPTIONS), rows)
+    names = np.array([name for name, _ in DESCRIPTIONS], dtype=object)
+    categories = np.array([category for _, category in DESCRIPTIONS], dtype=object)
+    numbers = rng.integers(1000, 10000, rows).astype(str).astype(object)
+    
+    income = rng.random(rows) < 0.15
+    cents = np.where(income, rng.integers(5000, 800000, rows), -rng.integers(100, 60000, rows))
+    valores = cents / 100
+    
+    conta_ids = np.array([f"0001-{10000 + i}" for i in range(accounts)], dtype=object)
+    return pd.DataFrame({
+        'data': dates.astype(str),
+        'descricao': names[templates] + ' ' + numbers,
+        'valor': valores,
+        'categoria': categories[templates],
+        'tipo': np.where(income, "Receita", "Despesa"),
+        'origem': 'OFX',
+        'fitid': [f"{seed}-{i}" for i in range(rows)],
+        'conta': conta_ids[rng.integers(0, accounts, rows)]
+    }, columns=COLUMNS)
+
+def ofx_bytes(rows, seed=42, version=1, account='12345-6', bank='0001', end=DEFAULT_END):
+    """
+    Extrato OFX com `rows` transações de uma conta
+    
+    version=1 gera OFX 1.x (SGML, cabeçalho chave:valor, sem tags de
+    fechamento nos campos); version=2 gera OFX 2.x (XML com tags fechadas).
+    """
+    frame = generate_frame(rows, seed, accounts=1, end=end)
+    compact = frame['data'].str.replace('-', '', regex=False)
+    balance = frame['valor'].sum()
+    
+    if version == 1:
+        header = ("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\n"
+                  "CHARSET:1252\nCOMPRESSION:NONE\nOLDFILEUID:NONE\nNEWFILEUID:NONE\n\n")
+        template = ("<STMTTRN>\n<TRNTYPE>{}\n<DTPOSTED>{}120000[-3:BRT]\n<TRNAMT>{:.2f}\n"
+                    "<FITID>{}\n<MEMO>{}\n</STMTTRN>\n")
+        account_tags = f"<BANKID>{bank}\n<ACCTID>{account}\n<ACCTTYPE>CHECKING\n"
+        ledger = f"<BALAMT>{balance:.2f}\n<DTASOF>{compact.iloc[-1] if rows else '20241231'}\n"
+    else:
+        header = ('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+                  '<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>\n')
+        template = ("<STMTTRN><TRNTYPE>{}</TRNTYPE><DTPOSTED>{}120000[-3:BRT]</DTPOSTED>"
+                    "<TRNAMT>{:.2f}</TRNAMT><FITID>{}</FITID><MEMO>{}</MEMO></STMTTRN>\n")
+        account_tags = f"<BANKID>{bank}</BANKID><ACCTID>{account}</ACCTID><ACCTTYPE>CHECKING</ACCTTYPE>"
+        ledger = (f"<BALAMT>{balance:.2f}</BALAMT>"
+                  f"<DTASOF>{compact.iloc[-1] if rows else '20241231'}</DTASOF>")
+    
+    parts = [header, "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>BRL",
+             "</CURDEF>" if version == 2 else "", "\n",
+             f"<BANKACCTFROM>{account_tags}</BANKACCTFROM>\n<BANKTRANLIST>\n"]
+    for day, valor, fitid, descricao in zip(compact, frame['valor'], frame['fitid'], frame['descricao']):
+        parts.append(template.format('CREDIT' if valor > 0 else 'DEBIT', day, valor, fitid, descricao))
+    parts.append(f"</BANKTRANLIST>\n<LEDGERBAL>{ledger}</LEDGERBAL>\n"
+                 "</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    return ''.join(parts).encode('ascii')
+
+def write_ofx(path, rows, seed=42, version=1, **options):
+    """Grava o extrato de ofx_bytes em `path` e retorna o caminho"""
+    with open(path, 'wb') as f:
+        f.write(ofx_bytes(rows, seed, version, **options))
+    return path
+
+def build_store(data_dir, rows, seed=42, accounts=4, batch_size=100000, end=DEFAULT_END, **options):
+    """
+    Cria (ou completa) um store com `rows` transações sintéticas
+    
+    Os lotes já vêm categorizados e sem duplicatas, então são gravados direto
+    (_prepare_frame + _append_frame), sem a deduplicação de import_frame, que
+    só atrasaria a montagem de stores grandes. Sem arquivamento por padrão:
+    as datas são de anos anteriores.
+    
+    Returns:
+        TransactionManager aberto sobre o store
+    """
+    options.setdefault('archive_after_days', None)
+    manager = TransactionManager(data_dir, **options)
+    frame = generate_frame(rows, seed, accounts=accounts, end=end)
+    with manager._lock:
+        for start in range(0, rows, batch_size):
+            manager._append_frame(manager._prepare_frame(frame.iloc[start:start + batch_size]))
+    return manager
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    
+    ofx_command = commands.add_parser('ofx', help="gera um arquivo OFX")
+    ofx_command.add_argument('path')
+    ofx_command.add_argument('--rows', type=int, default=50000)
+    ofx_command.add_argument('--version', type=int, choices=(1, 2), default=1)
+    ofx_command.add_argument('--seed', type=int, default=42)
+    ofx_command.add_argument('--end', default=DEFAULT_END)
+    
+    store_command = commands.add_parser('store', help="gera um diretório de transações")
+    store_command.add_argument('data_dir')
+    store_command.add_argument('--rows', type=int, default=1000000)
+    store_command.add_argument('--accounts', type=int, default=4)
+    store_command.add_argument('--seed', type=int, default=42)
+    store_command.add_argument('--end', default=DEFAULT_END)
+    args = arg_parser.parse_args()
+    
+    if args.command == 'ofx':
+        write_ofx(args.path, args.rows, args.seed, args.version, end=args.end)
+        print(f"OFX {args.version}.x com {args.rows} transações: {args.path} "
+              f"({os.path.getsize(args.path):,} bytes)")
+    else:
+        manager = build_store(args.data_dir, args.rows, args.seed, args.accounts, end=args.end)
+        print(f"Store com {manager.get_total_transactions()} transações em {args.data_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import atexit
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from text_utils import normalize_text
+
+class NaiveBayesCategorizer:
+    """
+    Categorizador Naive Bayes multinomial sobre os tokens das descrições
+    
+    O modelo é só uma matriz de contagens (categoria x token) e o número de
+    transações por categoria, então o treino é incremental (partial_fit soma
+    contagens) e a classificação de um lote inteiro é feita com operações
+    de matriz do numpy. Cada descrição distinta é normalizada uma única vez
+    por lote.
+    
+    A matriz é alocada com folga e dobra de tamanho quando enche, para que
+    tokens novos não copiem tudo a cada lote. Só as contagens não nulas vão
+    para o arquivo, e o treino incremental não grava a cada lote: maybe_save
+    salva a cada save_every transações aprendidas ou save_interval segundos,
+    e o que faltar é salvo ao encerrar o processo.
+    """
+    
+    def __init__(self, model_file=None, alpha=1.0, save_every=5000, save_interval=60.0):
+        self.model_file = model_file
+        self.alpha = alpha
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.classes = []
+        self.vocabulary = {}
+        self._class_index = {}
+        self._token_counts = np.zeros((0, 0), dtype=np.int64)
+        self._class_counts = np.zeros(0, dtype=np.int64)
+        self._log_probabilities = None
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._save_lock = threading.Lock()
+        if model_file:
+            self._load()
+            atexit.register(self.flush)
+    
+    def _counts(self):
+        """Contagens (categoria x token) em uso, sem a folga alocada"""
+        return self._token_counts[:len(self.classes), :len(self.vocabulary)]
+    
+    def is_trained(self):
+        """Indica se o modelo já viu ao menos uma transação"""
+        return bool(self._class_counts[:len(self.classes)].sum())
+    
+    def _load(self):
+        """Carrega as contagens do arquivo JSON"""
+        try:
+            if os.path.exists(self.model_file):
+                with open(self.model_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.classes = data['classes']
+                self._class_index = {name: i for i, name in enumerate(self.classes)}
+                self.vocabulary = {token: i for i, token in enumerate(data['tokens'])}
+                self._class_counts = np.asarray(data['class_counts'], dtype=np.int64)
+                if 'token_counts' in data:
+                    # Formato antigo: matriz densa
+                    self._token_counts = np.asarray(data['token_counts'], dtype=np.int64).reshape(
+                        len(self.classes), len(self.vocabulary))
+                else:
+                    self._token_counts = np.zeros((len(self.classes), len(self.vocabulary)), dtype=np.int64)
+                    rows, columns, counts = data['entries']
+                    self._token_counts[rows, columns] = counts
+        except Exception as e:
+            print(f"Erro ao carregar modelo de categorização: {str(e)}")
+    
+    def save(self):
+        """Salva as contagens não nulas no arquivo JSON (gravação atômica)"""
+        if not self.model_file:
+            return
+        with self._save_lock:
+            try:
+                counts = self._counts()
+                rows, columns = np.nonzero(counts)
+                temp_path = self.model_file + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'classes': self.classes,
+                        'tokens': list(self.vocabulary),
+                        'class_counts': self._class_counts[:len(self.classes)].tolist(),
+                        'entries': [rows.tolist(), columns.tolist(), counts[rows, columns].tolist()]
+                    }, f, ensure_ascii=False)
+                os.replace(temp_path, self.model_file)
+                self._unsaved = 0
+                self._saved_at = time.monotonic()
+            except Exception as e:
+                print(f"Erro ao salvar modelo de categorização: {str(e)}")
+    
+    def maybe_save(self):
+        """Salva se já acumulou save_every transações ou save_interval segundos sem salvar"""
+        if self._unsaved and (self._unsaved >= self.save_every or
+                              time.monotonic() - self._saved_at >= self.save_interval):
+            self.save()
+    
+    def flush(self):
+        """Salva o que ainda não foi salvo (chamado também ao encerrar o processo)"""
+        if self._unsaved:
+            self.save()
+    
+    def _tokenize(self, descriptions, add_tokens=False):
+        """
+        Tokens das descrições distintas de um lote
+        
+        Returns:
+            (código da descrição distinta de cada linha, lista com os ids de
+            token de cada descrição distinta); tokens fora do vocabulário são
+            ignorados, a menos que add_tokens seja True
+        """
+        codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object).fillna(''))
+        token_ids = []
+        for text in uniques:
+            ids = []
+            for token in normalize_text(text).split():
+                token_id = self.vocabulary.get(token)
+                if token_id is None and add_tokens:
+                    token_id = self.vocabulary[token] = len(self.vocabulary)
+                if token_id is not None:
+                    ids.append(token_id)
+            token_ids.append(np.asarray(ids, dtype=np.int64))
+        return codes, token_ids
+    
+    def _grow(self):
+        """Garante espaço para as categorias e tokens novos, dobrando a capacidade quando falta"""
+        capacity_rows, capacity_columns = self._token_counts.shape
+        if len(self.classes) <= capacity_rows and len(self.vocabulary) <= capacity_columns:
+            return
+        
+        rows = max(len(self.classes), capacity_rows * 2) if len(self.classes) > capacity_rows else capacity_rows
+        columns = max(len(self.vocabulary), capacity_columns * 2) if len(self.vocabulary) > capacity_columns \
+            else capacity_columns
+        token_counts = np.zeros((rows, columns), dtype=np.int64)
+        token_counts[:capacity_rows, :capacity_columns] = self._token_counts
+        self._token_counts = token_counts
+        if rows > len(self._class_counts):
+            self._class_counts = np.pad(self._class_counts, (0, rows - len(self._class_counts)))
+    
+    def partial_fit(self, descriptions, categories):
+        """Soma ao modelo um lote de transações já categorizadas"""
+        categories = pd.Series(categories, dtype=object)
+        if categories.empty:
+            return
+        
+        codes, token_ids = self._tokenize(descriptions, add_tokens=True)
+        category_codes, category_names = pd.factorize(categories)
+        for name in category_names:
+            if name not in self._class_index:
+                self._class_index[name] = len(self.classes)
+                self.classes.append(name)
+        self._grow()
+        
+        class_ids = np.asarray([self._class_index[name] for name in category_names], dtype=np.int64)[category_codes]
+        np.add.at(self._class_counts, class_ids, 1)
+        
+        # Pares (categoria, descrição) repetidos contam uma vez, com peso igual ao número de repetições
+        pairs, weights = np.unique(class_ids * len(token_ids) + codes, return_counts=True)
+        lengths = np.asarray([len(token_ids[pair % len(token_ids)]) for pair in pairs], dtype=np.int64)
+        if lengths.sum():
+            rows = np.repeat(pairs // len(token_ids), lengths)
+            columns = np.concatenate([token_ids[pair % len(token_ids)] for pair in pairs])
+            np.add.at(self._token_counts, (rows, columns), np.repeat(weights, lengths))
+        
+        self._unsaved += len(categories)
+        self._log_probabilities = None
+    
+    def fit(self, descriptions, categories):
+        """Treina o modelo do zero"""
+        self.classes = []
+        self.vocabulary = {}
+        self._class_index = {}
+        self._token_counts = np.zeros((0, 0), dtype=np.int64)
+        self._class_counts = np.zeros(0, dtype=np.int64)
+        self.partial_fit(descriptions, categories)
+    
+    def _model(self):
+        """Log das probabilidades a priori e dos tokens por categoria (refeito só após treino)"""
+        if self._log_probabilities is None:
+            smoothed = self._counts() + self.alpha
+            log_likelihood = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+            class_counts = self._class_counts[:len(self.classes)]
+            log_prior = np.log(class_counts) - np.log(class_counts.sum())
+            self._log_probabilities = (log_prior, log_likelihood)
+        return self._log_probabilities
+    
+    def predict(self, descriptions):
+        """
+        Classifica um lote de descrições
+        
+        Returns:
+            (array de categorias, array de confianças entre 0 e 1); descrições
+            sem nenhum token conhecido ficam sem categoria (None) e confiança 0
+        """
+        codes, token_ids = self._tokenize(descriptions)
+        if not self.is_trained() or len(codes) == 0:
+            return np.full(len(codes), None, dtype=object), np.zeros(len(codes))
+        
+        log_prior, log_likelihood = self._model()
+        scores = np.repeat(log_prior[:, None], len(token_ids), axis=1)
+        
+        # Soma dos log-likelihoods dos tokens de cada descrição, de uma vez para o lote
+        lengths = np.asarray([len(ids) for ids in token_ids], dtype=np.int64)
+        with_tokens = np.flatnonzero(lengths)
+        if with_tokens.size:
+            flat = np.concatenate([token_ids[i] for i in with_tokens])
+            starts = np.concatenate([[0], np.cumsum(lengths[with_tokens])[:-1]])
+            scores[:, with_tokens] += np.add.reduceat(log_likelihood[:, flat], starts, axis=1)
+        
+        # Softmax por coluna: confiança = probabilidade da categoria escolhida
+        scores -= scores.max(axis=0)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=0)
+        best = probabilities.argmax(axis=0)
+        
+        categories = np.asarray(self.classes, dtype=object)[best]
+        confidences = probabilities[best, np.arange(len(token_ids))]
+        # Sem tokens conhecidos só restaria a probabilidade a priori, que não diz nada da descrição
+        categories[lengths == 0] = None
+        confidences[lengths == 0] = 0.0
+        return categories[codes], confidences[codes]
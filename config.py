@@ -5,6 +5,32 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'ofx'}
+    
+    # Perfil de requisições com cProfile: ligado por PROFILING_ENABLED, cada
+    # requisição é perfilada se trouxer o cabeçalho X-Profile ou for sorteada
+    # com probabilidade PROFILING_SAMPLE_RATE
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_TOP_N = int(os.environ.get('PROFILING_TOP_N', 30))
+    PROFILING_MAX_ENTRIES = int(os.environ.get('PROFILING_MAX_ENTRIES', 50))
+    
+    # Token exigido (cabeçalho X-Admin-Token) pelos endpoints /api/admin e pelo
+    # cabeçalho X-Profile; sem ele, os dois ficam desabilitados
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # Rate limiting por cliente (IP), em memória do processo: requisições por
+    # minuto e rajada máxima, com orçamento próprio para os endpoints caros
+    # (uploads, importações, inserção em lote, exportação e relatórios)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'false').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+    RATELIMIT_PER_MINUTE = int(os.environ.get('RATELIMIT_PER_MINUTE', 600))
+    RATELIMIT_BURST = int(os.environ.get('RATELIMIT_BURST', 100))
+    RATELIMIT_EXPENSIVE_PER_MINUTE = int(os.environ.get('RATELIMIT_EXPENSIVE_PER_MINUTE', 30))
+    RATELIMIT_EXPENSIVE_BURST = int(os.environ.get('RATELIMIT_EXPENSIVE_BURST', 5))
+    
+    # Número de proxies reversos confiáveis na frente da API (ex.: 1 no Render).
+    # Com 0, o IP do cliente é o da conexão; senão, vem do X-Forwarded-For
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
@@ -25,8 +51,7 @@ class ProductionConfig(Config):
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     
     # Rate limiting
-    RATELIMIT_ENABLED = True
-    RATELIMIT_STORAGE_URL = "memory://"
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
 
 class TestingConfig(Config):
     """Configuração para testes"""
@@ -0,0 +1,108 @@
+import json
+import queue
+import threading
+
+class EventHub:
+    """
+    Distribui eventos para muitos assinantes, como as conexões de /api/events
+    
+    Cada evento é serializado uma única vez no formato Server-Sent Events e
+    colocado na fila de cada assinante. As filas têm tamanho limitado: um
+    cliente lento não segura quem publica nem acumula memória; quando a fila
+    dele enche, os eventos pendentes são trocados por um único 'resync', que
+    pede ao cliente para recarregar os dados.
+    
+    Cada conexão ocupa uma thread do servidor enquanto está aberta; com
+    max_subscribers, is_full avisa quando novas conexões devem ser recusadas
+    para que os assinantes não ocupem todas as threads da API.
+    """
+    
+    def __init__(self, max_queue=100, heartbeat=15.0, max_subscribers=None):
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    @property
+    def subscriber_count(self):
+        """Número de assinantes conectados"""
+        return len(self._subscribers)
+    
+    @property
+    def is_full(self):
+        """Se o limite de assinantes foi atingido"""
+        return self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers
+    
+    def subscribe(self):
+        """Cria a fila de um novo assinante"""
+        subscriber = queue.Queue(self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        """Remove um assinante"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def _format(self, event, data, event_id=None):
+        """Monta um evento no formato text/event-stream"""
+        message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+        if event_id is not None:
+            message = f"id: {event_id}\n" + message
+        return message
+    
+    def publish(self, event, data, event_id=None):
+        """Envia um evento a todos os assinantes, sem bloquear"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        
+        message = self._format(event, data, event_id)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Assinante atrasado: descarta o que ele não leu e pede para recarregar
+                self._drain(subscriber)
+                try:
+                    subscriber.put_nowait(self._format('resync', {}, event_id))
+                except queue.Full:
+                    # Outros publicadores encheram a fila de novo: o assinante é
+                    # desligado e a conexão dele termina com um resync (ver stream)
+                    self.unsubscribe(subscriber)
+    
+    def _drain(self, subscriber):
+        """Esvazia a fila de um assinante"""
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def stream(self):
+        """
+        Gerador de eventos de um assinante, para uma resposta text/event-stream
+        
+        Envia um comentário a cada `heartbeat` segundos sem eventos, para manter
+        a conexão aberta em proxies; a assinatura termina quando o cliente
+        desconecta (o gerador é fechado) ou quando é desligada por publish, e
+        nesse caso a conexão é encerrada com um 'resync'.
+        """
+        subscriber = self.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    with self._lock:
+                        dropped = subscriber not in self._subscribers
+                    if dropped:
+                        yield self._format('resync', {})
+                        return
+                    yield ": ping\n\n"
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,168 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets de latência
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Contador que só aumenta, com um valor por combinação de labels"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+    
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, key, (), value) for key, value in values]
+
+class Gauge(Counter):
+    """Valor que pode subir e descer (ex.: última taxa medida)"""
+    
+    kind = 'gauge'
+    
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    """Histograma com buckets fixos, soma e contagem por combinação de labels"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Contagem por bucket (não acumulada), soma e total
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def count(self, **labels):
+        entry = self._values.get(_label_key(labels))
+        return entry[2] if entry else 0
+    
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        
+        samples = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', key, (('le', _format_value(bound)),), cumulative))
+            samples.append((self.name + '_sum', key, (), total))
+            samples.append((self.name + '_count', key, (), count))
+        return samples
+
+class MetricsRegistry:
+    """
+    Registro de métricas do processo, exportado no formato texto do Prometheus
+    
+    Além das métricas registradas, aceita coletores: funções chamadas a cada
+    leitura que retornam amostras (labels, valor) de estado mantido em
+    outro lugar, como os contadores de acerto de um cache.
+    """
+    
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+    
+    def _register(self, cls, name, documentation, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **options)
+            elif type(metric) is not cls:
+                raise ValueError(f"Métrica {name} já registrada com outro tipo")
+            return metric
+    
+    def counter(self, name, documentation):
+        return self._register(Counter, name, documentation)
+    
+    def gauge(self, name, documentation):
+        return self._register(Gauge, name, documentation)
+    
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, buckets=buckets)
+    
+    def add_collector(self, kind, name, documentation, collect):
+        """Registra uma função que retorna [(labels, valor), ...] no momento da leitura"""
+        with self._lock:
+            self._collectors.append((kind, name, documentation, collect))
+    
+    def render(self):
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+            collectors = list(self._collectors)
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key, extra)} {_format_value(value)}")
+        
+        for kind, name, documentation, collect in collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        
+        return '\n'.join(lines) + '\n'
+
+# Registro usado pela API e pelos módulos instrumentados
+REGISTRY = MetricsRegistry()
@@ -1,85 +1,476 @@
+import codecs
+import html
+import mmap
+import os
 import re
-from datetime import datetime
-from dateutil import parser as date_parser
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from metrics import REGISTRY
+
+PARSE_SECONDS = REGISTRY.histogram('ofx_parse_seconds', 'Tempo de parse de cada arquivo OFX')
+PARSED_TRANSACTIONS = REGISTRY.counter('ofx_parsed_transactions_total', 'Transações lidas de arquivos OFX')
+PARSE_RATE = REGISTRY.gauge('ofx_parse_transactions_per_second', 'Transações por segundo no último arquivo OFX')
+
+def _record_parse(elapsed, transactions):
+    """Registra a duração (segundos) e a taxa de um parse"""
+    PARSE_SECONDS.observe(elapsed)
+    PARSED_TRANSACTIONS.inc(transactions)
+    if elapsed > 0:
+        PARSE_RATE.set(transactions / elapsed)
+
+# Cabeçalho OFX (1.x SGML ou declaração XML do 2.x) fica no início do arquivo
+_HEADER_SIZE = 4096
+# Uma só passada pelo arquivo: início de extrato, conta, saldo e transações, na ordem em que aparecem
+_STATEMENT_PATTERN = re.compile(
+    rb'<(?P<statement>STMTRS|CCSTMTRS)>'
+    rb'|<(?P<account>BANKACCTFROM|CCACCTFROM)>(?P<account_body>.*?)</(?P=account)>'
+    rb'|<LEDGERBAL>(?P<ledger>.*?)</LEDGERBAL>'
+    rb'|<STMTTRN>(?P<transaction>.*?)</STMTTRN>',
+    re.DOTALL
+)
+_TAG_PATTERN = re.compile(rb'<([A-Z0-9.]+)>([^<\r\n]*)')
+# Vale para XML e para SGML, onde os elementos podem não ter tag de fechamento
+_FIELD_PATTERN = re.compile(rb'<(TRNTYPE|DTPOSTED|TRNAMT|FITID|MEMO|NAME)>([^<\r\n]*)')
+
+def detect_ofx_encoding(header):
+    """
+    Codificação declarada no cabeçalho OFX
+    
+    OFX 2.x declara no XML (encoding="..."); OFX 1.x usa ENCODING e CHARSET,
+    e USASCII/1252 é o que a maioria dos bancos brasileiros envia.
+    """
+    match = re.search(rb'encoding\s*=\s*["\']([A-Za-z0-9_.:-]+)', header)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            return 'utf-8'
+    
+    encoding = re.search(rb'ENCODING:\s*([A-Za-z0-9-]+)', header)
+    if encoding and encoding.group(1).upper() in (b'UTF-8', b'UTF8', b'UNICODE'):
+        return 'utf-8'
+    
+    charset = re.search(rb'CHARSET:\s*([A-Za-z0-9-]+)', header)
+    if charset:
+        value = charset.group(1).upper()
+        if value in (b'ISO-8859-1', b'8859-1', b'LATIN1', b'LATIN-1'):
+            return 'latin-1'
+        if value in (b'1252', b'WINDOWS-1252', b'CP1252', b'NONE'):
+            return 'cp1252'
+    
+    # USASCII sem CHARSET útil: cp1252 cobre o ASCII e os acentos que os bancos mandam mesmo assim
+    if encoding:
+        return 'cp1252'
+    return 'utf-8'
+
+def decode_ofx_value(value, encoding):
+    """Decodifica o valor de um campo extraído em bytes"""
+    if value is None:
+        return None
+    try:
+        text = value.decode(encoding)
+    except UnicodeDecodeError:
+        # Cabeçalho que não corresponde ao conteúdo
+        text = value.decode('cp1252', errors='replace')
+    text = text.strip()
+    if '&' in text:
+        text = html.unescape(text)
+    return text
+
+def _as_char_matrix(values, min_width=1):
+    """
+    Converte uma sequência de textos em uma matriz (n, largura) de bytes ASCII
+    
+    Aceita str ou bytes. A largura é a do maior texto (no mínimo min_width);
+    os mais curtos são completados com bytes nulos à direita.
+    """
+    raw = [v.strip() if v else b'' for v in values]
+    try:
+        array = np.array(raw, dtype=bytes)
+    except UnicodeEncodeError:
+        array = np.array([v.encode('ascii', 'replace') if isinstance(v, str) else v for v in raw], dtype=bytes)
+    width = max(array.dtype.itemsize, min_width)
+    array = array.astype(f'S{width}')
+    return array.view(np.uint8).reshape(len(raw), width)
+
+def _parse_ofx_offset(suffix):
+    """Converte o sufixo de fuso ('[-3:BRT]', '[+5.5]') em segundos"""
+    match = re.match(rb'\[\s*([+-]?\d+(?:[.,]\d+)?)', suffix.strip(b'\x00'))
+    if not match:
+        return 0
+    return int(round(float(match.group(1).replace(b',', b'.')) * 3600))
+
+def _ofx_offsets(chars):
+    """Deslocamento do fuso de cada linha da matriz, em segundos"""
+    is_open = chars == ord('[')
+    has_offset = is_open.any(axis=1)
+    start = np.argmax(is_open, axis=1)
+    
+    # Zerar tudo antes do '[' deixa iguais as linhas com o mesmo sufixo;
+    # cada sufixo distinto (em geral um só por arquivo) é interpretado uma vez
+    tails = np.where(np.arange(chars.shape[1]) >= start[:, None], chars, 0)
+    tails[~has_offset] = 0
+    tails = np.ascontiguousarray(tails).view(f'S{chars.shape[1]}').ravel()
+    uniques, inverse = np.unique(tails, return_inverse=True)
+    offsets = np.array([_parse_ofx_offset(suffix) for suffix in uniques], dtype=np.int64)
+    return offsets[inverse.ravel()]
+
+def convert_ofx_dates(values, utc=False):
+    """
+    Converte datas OFX (AAAAMMDD[HHMMSS[.XXX]][fuso:nome]) em lote para datetime64[s]
+    
+    Os dígitos são lidos por posição fixa em uma matriz de bytes, sem regex nem
+    strptime por linha. Datas inválidas viram NaT. O resultado é a hora local do
+    extrato; com utc=True o deslocamento do sufixo (ex.: [-3:BRT], em horas) é
+    descontado e o resultado é o instante em UTC.
+    """
+    chars = _as_char_matrix(values, min_width=14)
+    digits = chars[:, :14].astype(np.int64) - 48
+    is_digit = (digits >= 0) & (digits <= 9)
+    digits = np.where(is_digit, digits, 0)
+    
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+    
+    # Só a data (AAAAMMDD) é obrigatória; sem os seis dígitos de hora, meia-noite
+    has_time = is_digit[:, 8:14].all(axis=1)
+    seconds = np.where(has_time, hour * 3600 + minute * 60 + second, 0)
+    valid = is_digit[:, :8].all(axis=1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    valid &= ~has_time | ((hour < 24) & (minute < 60) & (second < 61))
+    
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + np.where(valid, day - 1, 0)
+    # Dias que passam do fim do mês (ex.: 31/02) caem no mês seguinte
+    valid &= days.astype('datetime64[M]') == months
+    
+    if utc:
+        seconds = seconds - _ofx_offsets(chars)
+    result = days.astype('datetime64[s]') + seconds.astype('timedelta64[s]')
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+def convert_ofx_amounts(values):
+    """
+    Converte valores TRNAMT em lote para centavos (int64)
+    
+    Aceita sinal e ponto ou vírgula como separador decimal; a terceira casa
+    decimal, se houver, é arredondada. Valor ausente conta como zero.
+    
+    Returns:
+        tupla (centavos, válidos), onde válidos marca as linhas bem formadas
+    """
+    chars = _as_char_matrix(values, min_width=4)
+    width = chars.shape[1]
+    positions = np.arange(width)
+    
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    is_sep = (chars == ord('.')) | (chars == ord(','))
+    is_sign = (chars == ord('-')) | (chars == ord('+'))
+    length = (chars != 0).sum(axis=1)
+    
+    valid = (is_digit | is_sep | is_sign | (chars == 0)).all(axis=1)
+    valid &= (is_sep.sum(axis=1) <= 1) & ~is_sign[:, 1:].any(axis=1)
+    valid &= is_digit.any(axis=1) | (length == 0)
+    
+    sep = np.where(is_sep.any(axis=1), np.argmax(is_sep, axis=1), length)
+    # Até 16 dígitos inteiros: com as duas casas decimais, cabe em int64 sem estourar
+    valid &= sep <= 16
+    
+    digits = np.where(is_digit, chars.astype(np.int64) - ord('0'), 0)
+    
+    # Os dígitos inteiros são contíguos antes do separador: o expoente é a distância até ele
+    exponent = np.clip(sep[:, None] - 1 - positions, 0, 16)
+    integer = (digits * np.where(positions < sep[:, None], 10 ** exponent, 0)).sum(axis=1)
+    
+    def decimal_digit(offset):
+        index = np.minimum(sep + offset, width - 1)[:, None]
+        present = np.take_along_axis(is_digit, index, axis=1)[:, 0] & (sep + offset < width)
+        return np.where(present, np.take_along_axis(digits, index, axis=1)[:, 0], 0)
+    
+    cents = integer * 100 + decimal_digit(1) * 10 + decimal_digit(2) + (decimal_digit(3) >= 5)
+    cents = np.where(chars[:, 0] == ord('-'), -cents, cents)
+    return np.where(valid, cents, 0), valid
+
+def _parse_file_worker(file_path):
+    """
+    Processa um arquivo em um processo do pool, devolvendo o erro em vez de lançá-lo
+    
+    As métricas do parse não são registradas aqui: o registro de um processo
+    filho não chega ao /metrics, então a duração volta no resultado para o
+    processo principal registrar.
+    """
+    parser = OFXParser()
+    start = time.perf_counter()
+    try:
+        statements = parser._split_statements(*parser._parse_columns(file_path, record=False))
+        return {'statements': statements, 'seconds': time.perf_counter() - start, 'error': None}
+    except Exception as e:
+        return {'statements': [], 'seconds': None, 'error': str(e)}
 
 class OFXParser:
+    # Regras de categorização (palavra-chave contida na descrição)
+    CATEGORY_KEYWORDS = {
+        'Alimentação': [
+            'supermercado', 'supermer', 'mercado', 'padaria', 'panificadora',
+            'restaurante', 'lanchonete', 'pizzaria', 'hamburgueria', 'burger',
+            'delicias', 'caseira', 'mix', 'cebola', 'mercado', 'gigantao'
+        ],
+        'Transporte': [
+            'posto', 'combustível', 'gasolina', 'uber', '99', 'taxi',
+            'metro', 'ônibus', 'estacionamento'
+        ],
+        'Serviços': [
+            'netflix', 'spotify', 'youtube', 'amazon', 'google',
+            'telefone', 'internet', 'energia', 'água', 'gás'
+        ],
+        'Saúde': [
+            'farmácia', 'drogaria', 'médico', 'hospital', 'consulta',
+            'exame', 'medicamento'
+        ],
+        'Educação': [
+            'escola', 'universidade', 'curso', 'livro', 'material escolar'
+        ],
+        'Lazer': [
+            'cinema', 'teatro', 'show', 'viagem', 'hotel', 'passeio'
+        ],
+        'Transferência': [
+            'transferência', 'pix', 'ted', 'doc', 'pagamento'
+        ]
+    }
+    
     def __init__(self):
         self.transactions = []
     
     def parse_ofx_file(self, file_path):
         """Parse um arquivo OFX e extrai as transações"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            # Encontrar todas as transações
-            transaction_pattern = r'<STMTTRN>(.*?)</STMTTRN>'
-            transactions_raw = re.findall(transaction_pattern, content, re.DOTALL)
-            
-            transactions = []
-            for trans_raw in transactions_raw:
-                transaction = self._parse_transaction(trans_raw)
-                if transaction:
-                    transactions.append(transaction)
-            
-            return transactions
-            
+            return self._parse_file(file_path)
         except Exception as e:
             print(f"Erro ao processar arquivo OFX: {str(e)}")
             return []
     
-    def _parse_transaction(self, trans_raw):
-        """Parse uma transação individual"""
-        try:
-            # Extrair dados da transação
-            trntype = self._extract_tag(trans_raw, 'TRNTYPE')
-            dtposted = self._extract_tag(trans_raw, 'DTPOSTED')
-            trnamt = self._extract_tag(trans_raw, 'TRNAMT')
-            memo = self._extract_tag(trans_raw, 'MEMO')
-            
-            # Converter data
-            date = self._parse_ofx_date(dtposted)
-            
-            # Converter valor
-            amount = float(trnamt) if trnamt else 0.0
-            
-            # Determinar tipo
-            tipo = "Receita" if amount > 0 else "Despesa"
-            
-            # Categorizar automaticamente
-            categoria = self._categorize_transaction(memo)
-            
-            return {
-                'data': date.strftime('%Y-%m-%d'),
-                'descricao': memo or "Transação sem descrição",
-                'valor': amount,
-                'categoria': categoria,
-                'tipo': tipo,
-                'origem': 'OFX'
-            }
+    def parse_ofx_files(self, file_paths, workers=None):
+        """
+        Parse vários arquivos OFX em paralelo, um arquivo por processo
+        
+        Args:
+            file_paths: caminhos dos arquivos
+            workers: número de processos (padrão: número de CPUs)
+        
+        Returns:
+            dict com os extratos de todos os arquivos, na ordem dos arquivos
+            (formato de parse_ofx_statements), e o resultado de cada arquivo
+            ('arquivo', 'total' e 'erro', None se deu certo). Um arquivo sem
+            nenhuma transação (vazio, corrompido ou que não é OFX) tem erro.
+        """
+        file_paths = list(file_paths)
+        workers = min(workers or os.cpu_count() or 1, len(file_paths)) or 1
+        
+        if workers == 1:
+            results = [_parse_file_worker(path) for path in file_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # map preserva a ordem de entrada, independente de qual processo termina antes
+                results = list(executor.map(_parse_file_worker, file_paths))
+        
+        statements = []
+        files = []
+        for path, result in zip(file_paths, results):
+            total = sum(len(statement['transactions']) for statement in result['statements'])
+            error = result['error']
+            if error is None:
+                _record_parse(result['seconds'], total)
+                if total == 0:
+                    error = 'Nenhuma transação encontrada no arquivo OFX'
+            statements.extend(result['statements'])
+            files.append({
+                'arquivo': path,
+                'total': total,
+                'erro': error
+            })
+        
+        return {'statements': statements, 'files': files}
+    
+    def parse_ofx_to_frame(self, file_path):
+        """
+        Parse um arquivo OFX direto para um DataFrame
+        
+        Os campos são acumulados em listas por coluna, sem montar um dict por
+        transação, e DTPOSTED/TRNAMT são convertidos de uma vez para o lote
+        inteiro (convert_ofx_dates e convert_ofx_amounts). A coluna 'data' sai
+        como datetime64 (dia do extrato) e 'valor' como float, pronta para
+        TransactionManager.import_frame. Transações com data ou valor inválido
+        são descartadas.
+        """
+        return self._parse_columns(file_path)[0]
+    
+    def parse_ofx_statements(self, file_path):
+        """
+        Parse um arquivo OFX separando as transações por conta
+        
+        Extratos consolidados podem trazer conta corrente (BANKACCTFROM) e
+        cartão de crédito (CCACCTFROM) no mesmo arquivo. Em uma única passada,
+        cada transação é associada à conta do extrato que a contém e o saldo
+        (LEDGERBAL) de cada conta é preservado.
+        
+        Returns:
+            lista com um dict por conta: 'conta', 'tipo_conta', 'banco',
+            'saldo', 'data_saldo' e 'transactions' (DataFrame no formato de
+            parse_ofx_to_frame)
+        """
+        return self._split_statements(*self._parse_columns(file_path))
+    
+    def _split_statements(self, frame, accounts):
+        """Separa o DataFrame de _parse_columns em um extrato por conta"""
+        positions = frame.groupby('conta', sort=False).indices if not frame.empty else {}
+        
+        statements = []
+        for conta, account in accounts.items():
+            rows = positions.get(conta, [])
+            statements.append(dict(account, transactions=frame.iloc[rows].reset_index(drop=True)))
+        return statements
+    
+    def _parse_columns(self, file_path, record=True):
+        """
+        Passada única pelo arquivo: DataFrame de transações e dict das contas encontradas
+        
+        Com record=False a duração não é registrada nas métricas (quem chama registra).
+        """
+        start = time.perf_counter()
+        raw_dates = []
+        raw_amounts = []
+        descriptions = []
+        categories = []
+        fitids = []
+        accounts_column = []
+        accounts = {}
+        
+        for fields, encoding, conta in self._scan_transactions(file_path, accounts):
+            # Data e valor são ASCII: seguem em bytes direto para a conversão em lote
+            raw_dates.append(fields.get(b'DTPOSTED'))
+            raw_amounts.append(fields.get(b'TRNAMT'))
+            memo = decode_ofx_value(fields.get(b'MEMO') or fields.get(b'NAME'), encoding)
+            descriptions.append(memo or "Transação sem descrição")
+            categories.append(self._categorize_transaction(memo))
+            fitids.append(decode_ofx_value(fields.get(b'FITID'), encoding) or '')
+            accounts_column.append(conta)
+        
+        dates = convert_ofx_dates(raw_dates)
+        cents, valid = convert_ofx_amounts(raw_amounts)
+        valid &= ~np.isnat(dates)
+        
+        valores = cents / 100
+        frame = pd.DataFrame({
+            'data': dates.astype('datetime64[D]').astype('datetime64[ns]'),
+            'descricao': descriptions,
+            'valor': valores,
+            'categoria': categories,
+            'tipo': np.where(valores > 0, "Receita", "Despesa"),
+            'origem': 'OFX',
+            'fitid': fitids,
+            'conta': accounts_column
+        })
+        
+        if not valid.all():
+            print(f"{int((~valid).sum())} transações com data ou valor inválido ignoradas")
+            frame = frame[valid].reset_index(drop=True)
+        
+        if record:
+            _record_parse(time.perf_counter() - start, len(frame))
+        return frame, accounts
+    
+    def _scan_transactions(self, file_path, accounts=None):
+        """
+        Percorre os blocos <STMTTRN> do arquivo mapeado em memória (mmap)
+        
+        O arquivo nunca é decodificado por inteiro: os blocos são localizados
+        nos bytes e cada campo sai ainda em bytes, junto com a codificação
+        declarada no cabeçalho OFX, para ser decodificado só se for usado.
+        A conta do extrato corrente (BANKACCTFROM/CCACCTFROM) acompanha cada
+        transação; se `accounts` for informado, recebe os dados de cada conta
+        e o saldo (LEDGERBAL) mais recente dela.
+        
+        Yields:
+            tupla (campos, codificação, conta), com campos no formato {b'TAG': b'valor'}
+        """
+        if accounts is None:
+            accounts = {}
+        
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
             
-        except Exception as e:
-            print(f"Erro ao processar transação: {str(e)}")
-            return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                encoding = detect_ofx_encoding(content[:_HEADER_SIZE])
+                conta = ''
+                statement_type = None
+                for match in _STATEMENT_PATTERN.finditer(content):
+                    if match.group('transaction') is not None:
+                        if conta not in accounts:
+                            accounts[conta] = self._new_account(conta, None, {}, encoding)
+                        fields = dict(_FIELD_PATTERN.findall(content, match.start('transaction'), match.end('transaction')))
+                        yield fields, encoding, conta
+                    elif match.group('statement') is not None:
+                        # Novo extrato: a conta só é conhecida quando o BANKACCTFROM/CCACCTFROM aparecer
+                        statement_type = match.group('statement')
+                        conta = ''
+                    elif match.group('account') is not None:
+                        fields = dict(_TAG_PATTERN.findall(content, match.start('account_body'), match.end('account_body')))
+                        conta = self._account_id(fields, encoding)
+                        if conta not in accounts:
+                            accounts[conta] = self._new_account(conta, statement_type, fields, encoding)
+                    else:
+                        fields = dict(_TAG_PATTERN.findall(content, match.start('ledger'), match.end('ledger')))
+                        self._update_ledger(accounts.setdefault(conta, self._new_account(conta, None, {}, encoding)),
+                                            fields, encoding)
     
-    def _extract_tag(self, content, tag):
-        """Extrai o valor de uma tag XML"""
-        pattern = f'<{tag}>(.*?)</{tag}>'
-        match = re.search(pattern, content, re.DOTALL)
-        return match.group(1) if match else None
+    def _account_id(self, fields, encoding):
+        """Identificador da conta: banco e número (ACCTID), quando houver banco"""
+        acctid = decode_ofx_value(fields.get(b'ACCTID'), encoding) or ''
+        bankid = decode_ofx_value(fields.get(b'BANKID'), encoding)
+        return f"{bankid}-{acctid}" if bankid else acctid
     
-    def _parse_ofx_date(self, date_str):
-        """Converte data OFX para datetime"""
-        try:
-            # Formato OFX: YYYYMMDDHHMMSS[timezone]
-            if date_str:
-                # Remover timezone se presente
-                date_clean = re.sub(r'\[.*?\]', '', date_str)
-                # Converter para datetime
-                return datetime.strptime(date_clean, '%Y%m%d%H%M%S')
-            return datetime.now()
-        except:
-            return datetime.now()
+    def _new_account(self, conta, statement_type, fields, encoding):
+        """Dados de uma conta encontrada no arquivo"""
+        acctype = decode_ofx_value(fields.get(b'ACCTTYPE'), encoding)
+        if not acctype and statement_type == b'CCSTMTRS':
+            acctype = 'CREDITCARD'
+        return {
+            'conta': conta,
+            'tipo_conta': acctype or '',
+            'banco': decode_ofx_value(fields.get(b'BANKID'), encoding) or '',
+            'saldo': None,
+            'data_saldo': None
+        }
+    
+    def _update_ledger(self, account, fields, encoding):
+        """Registra o LEDGERBAL na conta, mantendo o mais recente se houver vários extratos"""
+        amount = decode_ofx_value(fields.get(b'BALAMT'), encoding)
+        as_of = decode_ofx_value(fields.get(b'DTASOF'), encoding) or ''
+        if not amount:
+            return
+        data_saldo = f"{as_of[:4]}-{as_of[4:6]}-{as_of[6:8]}" if len(as_of) >= 8 else None
+        if account['data_saldo'] and data_saldo and data_saldo < account['data_saldo']:
+            return
+        account['saldo'] = float(amount.replace(',', '.'))
+        account['data_saldo'] = data_saldo
+    
+    def _parse_file(self, file_path):
+        """
+        Parse um arquivo OFX para uma lista de dicts, lançando exceção em caso de erro
+        
+        Usa o mesmo caminho em lote de parse_ofx_to_frame, então datas e valores
+        são interpretados igual nos dois formatos de saída.
+        """
+        frame = self._parse_columns(file_path)[0]
+        frame['data'] = frame['data'].values.astype('datetime64[D]').astype(str)
+        return frame.to_dict('records')
     
     def _categorize_transaction(self, description):
         """Categoriza automaticamente uma transação baseada na descrição"""
@@ -88,37 +479,7 @@ class OFXParser:
         
         desc_lower = description.lower()
         
-        # Regras de categorização
-        categories = {
-            'Alimentação': [
-                'supermercado', 'supermer', 'mercado', 'padaria', 'panificadora',
-                'restaurante', 'lanchonete', 'pizzaria', 'hamburgueria', 'burger',
-                'delicias', 'caseira', 'mix', 'cebola', 'mercado', 'gigantao'
-            ],
-            'Transporte': [
-                'posto', 'combustível', 'gasolina', 'uber', '99', 'taxi',
-                'metro', 'ônibus', 'estacionamento'
-            ],
-            'Serviços': [
-                'netflix', 'spotify', 'youtube', 'amazon', 'google',
-                'telefone', 'internet', 'energia', 'água', 'gás'
-            ],
-            'Saúde': [
-                'farmácia', 'drogaria', 'médico', 'hospital', 'consulta',
-                'exame', 'medicamento'
-            ],
-            'Educação': [
-                'escola', 'universidade', 'curso', 'livro', 'material escolar'
-            ],
-            'Lazer': [
-                'cinema', 'teatro', 'show', 'viagem', 'hotel', 'passeio'
-            ],
-            'Transferência': [
-                'transferência', 'pix', 'ted', 'doc', 'pagamento'
-            ]
-        }
-        
-        for category, keywords in categories.items():
+        for category, keywords in self.CATEGORY_KEYWORDS.items():
             for keyword in keywords:
                 if keyword in desc_lower:
                     return category
@@ -0,0 +1,61 @@
+import time
+
+class RateLimiter:
+    """
+    Limite de requisições por cliente, no modelo de balde de fichas (token bucket)
+    
+    Cada cliente tem `burst` fichas que se recompõem a `rate` por segundo.
+    Em vez do número de fichas, guarda por cliente um único float: o instante
+    em que o balde dele estará cheio de novo (algoritmo GCRA, equivalente ao
+    balde de fichas). Sem lock: a leitura e a gravação no dict são atômicas no
+    CPython, e duas requisições simultâneas do mesmo cliente podem, no máximo,
+    gastar uma ficha só, o que deixa o limite um pouco mais tolerante, nunca
+    mais restritivo.
+    """
+    
+    def __init__(self, rate, burst, max_clients=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._interval = 1.0 / rate
+        self._capacity = burst * self._interval
+        self._clock = clock
+        self._full_at = {}
+        self._next_prune = 0.0
+    
+    @property
+    def client_count(self):
+        return len(self._full_at)
+    
+    def acquire(self, client):
+        """
+        Consome uma ficha do cliente
+        
+        Returns:
+            0.0 se a requisição foi aceita; senão, os segundos até a próxima ficha
+        """
+        now = self._clock()
+        full_at = self._full_at.get(client, now)
+        if full_at < now:
+            full_at = now
+        
+        full_at += self._interval
+        wait = full_at - now - self._capacity
+        if wait > 0:
+            return wait
+        
+        self._full_at[client] = full_at
+        # Limpeza no máximo uma vez por segundo, mesmo com todos os clientes ativos
+        if len(self._full_at) > self.max_clients and now >= self._next_prune:
+            self._next_prune = now + 1.0
+            self._prune(now)
+        return 0.0
+    
+    def _prune(self, now):
+        """Esquece os clientes com o balde cheio (equivalente a nunca terem chegado)"""
+        for client, full_at in list(self._full_at.items()):
+            if full_at <= now:
+                self._full_at.pop(client, None)
+    
+    def reset(self):
+        self._full_at = {}
@@ -0,0 +1,86 @@
+import cProfile
+import itertools
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+class RequestProfiler:
+    """
+    Perfil de requisições com cProfile, guardado em um buffer circular
+    
+    Só as requisições escolhidas (forçadas por cabeçalho ou sorteadas com
+    probabilidade sample_rate) são perfiladas; as demais pagam apenas a
+    decisão. Um perfil por vez: se outra requisição já está sendo perfilada,
+    a nova segue sem perfil (o cProfile não aceita dois perfis ativos no
+    mesmo processo a partir do Python 3.12).
+    """
+    
+    def __init__(self, sample_rate=0.0, top_n=30, max_entries=50):
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self._entries = deque(maxlen=max_entries)
+        self._ids = itertools.count(1)
+        self._active = threading.Lock()
+    
+    def should_profile(self, forced=False):
+        """Decide se a requisição atual deve ser perfilada"""
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+    
+    def start(self):
+        """Inicia um perfil; retorna None se já houver outro em andamento"""
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.start_time = time.perf_counter()
+        profile.enable()
+        return profile
+    
+    def finish(self, profile, method, path, status):
+        """Encerra o perfil e guarda as top_n funções por tempo acumulado"""
+        profile.disable()
+        elapsed = time.perf_counter() - profile.start_time
+        self._active.release()
+        
+        stats = pstats.Stats(profile).stats
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top_n]
+        entry = {
+            'id': next(self._ids),
+            'timestamp': datetime.now().isoformat(),
+            'method': method,
+            'path': path,
+            'status': status,
+            'duracao_ms': round(elapsed * 1000, 3),
+            'funcoes': [
+                {
+                    'funcao': function,
+                    'arquivo': file_name,
+                    'linha': line,
+                    'chamadas': calls,
+                    'tempo_proprio_ms': round(own_time * 1000, 3),
+                    'tempo_acumulado_ms': round(cumulative_time * 1000, 3)
+                }
+                for (file_name, line, function), (_, calls, own_time, cumulative_time, _) in top
+            ]
+        }
+        self._entries.append(entry)
+        return entry
+    
+    def discard(self, profile):
+        """Encerra um perfil sem guardá-lo (requisição interrompida)"""
+        profile.disable()
+        self._active.release()
+    
+    def entries(self):
+        """Resumo dos perfis guardados, do mais recente para o mais antigo"""
+        return [{key: value for key, value in entry.items() if key != 'funcoes'}
+                for entry in reversed(self._entries)]
+    
+    def get(self, entry_id):
+        """Perfil completo pelo id, ou None se já saiu do buffer"""
+        for entry in self._entries:
+            if entry['id'] == entry_id:
+                return entry
+        return None
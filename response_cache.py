@@ -0,0 +1,49 @@
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    Cache LRU de corpos de resposta já comprimidos, limitado pelo total de bytes
+    
+    As chaves incluem o ETag da resposta (ver api_server.conditional_get), que
+    muda com a versão dos dados; entradas de versões antigas nunca mais são
+    pedidas e saem do cache conforme ele enche.
+    """
+    
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Corpo guardado para a chave, ou None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+    
+    def put(self, key, data):
+        """Guarda um corpo, descartando os menos usados se passar do limite"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
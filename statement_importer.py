@@ -0,0 +1,267 @@
+import json
+import os
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+from ofx_parser import OFXParser
+
+# Perfis de mapeamento de colunas. 'colunas' liga cada campo da transação ao
+# nome da coluna no arquivo; o valor vem de 'valor' ou de 'credito' e 'debito'.
+# 'categoria', 'fitid' e 'conta' são opcionais. As opções de texto
+# (separador, codificacao) só valem para CSV.
+DEFAULT_PROFILES = {
+    # Mesmo formato do CSV gerado por /api/export
+    'padrao': {
+        'separador': ',',
+        'decimal': '.',
+        'milhar': '',
+        'codificacao': 'utf-8',
+        'formato_data': '%Y-%m-%d',
+        'linhas_ignoradas': 0,
+        'colunas': {'data': 'data', 'descricao': 'descricao', 'valor': 'valor',
+                    'categoria': 'categoria', 'fitid': 'fitid', 'conta': 'conta'}
+    },
+    # Planilhas no formato brasileiro: 31/01/2024 e 1.234,56
+    'brasil': {
+        'separador': ';',
+        'decimal': ',',
+        'milhar': '.',
+        'codificacao': 'utf-8-sig',
+        'formato_data': '%d/%m/%Y',
+        'linhas_ignoradas': 0,
+        'colunas': {'data': 'Data', 'descricao': 'Descrição', 'valor': 'Valor'}
+    },
+    # Extratos com colunas separadas de crédito e débito
+    'credito_debito': {
+        'separador': ';',
+        'decimal': ',',
+        'milhar': '.',
+        'codificacao': 'utf-8-sig',
+        'formato_data': '%d/%m/%Y',
+        'linhas_ignoradas': 0,
+        'colunas': {'data': 'Data', 'descricao': 'Histórico', 'credito': 'Crédito', 'debito': 'Débito'}
+    }
+}
+
+# Campos que podem faltar no arquivo mesmo estando no perfil
+OPTIONAL_FIELDS = ('categoria', 'fitid', 'conta')
+
+CSV_EXTENSIONS = {'csv', 'txt'}
+XLSX_EXTENSIONS = {'xlsx', 'xlsm'}
+
+def convert_amounts(values, decimal=',', thousands='.'):
+    """
+    Converte uma coluna de valores em float, de uma vez
+    
+    Textos como 'R$ -1.234,56' são limpos com operações vetorizadas do pandas;
+    células que já são números (planilhas) são mantidas como estão.
+    Valores inválidos viram NaN.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    
+    values = values.astype(object)
+    is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    amounts = pd.to_numeric(values.where(~is_text), errors='coerce').astype(float)
+    if is_text.any():
+        text = values[is_text].str.strip()
+        if thousands:
+            text = text.str.replace(thousands, '', regex=False)
+        if decimal != '.':
+            text = text.str.replace(decimal, '.', regex=False)
+        text = text.str.replace(r'[^\d.\-]', '', regex=True)
+        amounts[is_text] = pd.to_numeric(text, errors='coerce')
+    return amounts
+
+class StatementImporter:
+    """
+    Importador de extratos em CSV e XLSX, com perfis de mapeamento de colunas
+    
+    Gera DataFrames no mesmo formato de OFXParser.parse_ofx_to_frame, em blocos,
+    para alimentar TransactionManager.import_frame sem carregar o arquivo inteiro.
+    """
+    
+    def __init__(self, profiles_file="import_profiles.json"):
+        self.profiles_file = profiles_file
+        self.profiles = self._load_profiles()
+        self._ofx_parser = OFXParser()
+    
+    def _load_profiles(self):
+        """Carrega os perfis padrão mais os salvos no arquivo JSON"""
+        profiles = {name: dict(profile) for name, profile in DEFAULT_PROFILES.items()}
+        try:
+            if os.path.exists(self.profiles_file):
+                with open(self.profiles_file, 'r', encoding='utf-8') as f:
+                    for name, profile in json.load(f).items():
+                        profiles[name] = {**DEFAULT_PROFILES['padrao'], **profile}
+        except Exception as e:
+            print(f"Erro ao carregar perfis de importação: {str(e)}")
+        return profiles
+    
+    def _save_profiles(self):
+        """Salva os perfis criados pelo usuário no arquivo JSON"""
+        try:
+            custom = {name: profile for name, profile in self.profiles.items()
+                      if DEFAULT_PROFILES.get(name) != profile}
+            with open(self.profiles_file, 'w', encoding='utf-8') as f:
+                json.dump(custom, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Erro ao salvar perfis de importação: {str(e)}")
+    
+    def get_profiles(self):
+        """Retorna os perfis disponíveis"""
+        return self.profiles
+    
+    def add_profile(self, name, profile):
+        """Adiciona (ou substitui) um perfil; campos omitidos vêm do perfil 'padrao'"""
+        columns = profile.get('colunas', {})
+        if 'data' not in columns or 'descricao' not in columns or \
+                ('valor' not in columns and not ('credito' in columns and 'debito' in columns)):
+            raise ValueError("O perfil precisa mapear data, descricao e valor (ou credito e debito)")
+        
+        self.profiles[name] = {**DEFAULT_PROFILES['padrao'], **profile}
+        self._save_profiles()
+    
+    def parse_file(self, file_path, profile='padrao', conta=None):
+        """Lê o extrato inteiro em um único DataFrame"""
+        frames = list(self.iter_frames(file_path, profile, conta))
+        if not frames:
+            return self._convert_chunk(pd.DataFrame(), self._get_profile(profile), conta, '')
+        return pd.concat(frames, ignore_index=True)
+    
+    def iter_frames(self, file_path, profile='padrao', conta=None, chunk_size=50000):
+        """
+        Lê um extrato CSV ou XLSX em blocos de chunk_size linhas
+        
+        Args:
+            file_path: caminho do arquivo (.csv, .txt, .xlsx ou .xlsm)
+            profile: nome do perfil de colunas
+            conta: conta atribuída às transações (padrão: coluna 'conta' do
+                arquivo ou 'conta' do perfil, se houver)
+        
+        Yields:
+            DataFrames com as colunas de OFXParser.parse_ofx_to_frame; linhas
+            com data ou valor inválido são descartadas
+        """
+        profile = self._get_profile(profile)
+        extension = file_path.rsplit('.', 1)[-1].lower()
+        if extension in CSV_EXTENSIONS:
+            chunks, origem = self._iter_csv_chunks(file_path, profile, chunk_size), 'CSV'
+        elif extension in XLSX_EXTENSIONS:
+            chunks, origem = self._iter_xlsx_chunks(file_path, profile, chunk_size), 'XLSX'
+        else:
+            raise ValueError(f"Formato de extrato não suportado: {extension}")
+        
+        for raw in chunks:
+            yield self._convert_chunk(raw, profile, conta, origem)
+    
+    def _get_profile(self, name):
+        if name not in self.profiles:
+            raise ValueError(f"Perfil de importação desconhecido: {name}")
+        return self.profiles[name]
+    
+    def _check_columns(self, header, profile):
+        """Confere se o arquivo tem as colunas obrigatórias do perfil"""
+        required = [column for field, column in profile['colunas'].items() if field not in OPTIONAL_FIELDS]
+        missing = [column for column in required if column not in header]
+        if missing:
+            raise ValueError(f"Colunas não encontradas no arquivo: {', '.join(missing)}")
+        return [column for column in profile['colunas'].values() if column in header]
+    
+    def _iter_csv_chunks(self, file_path, profile, chunk_size):
+        """Blocos de linhas de um CSV, só com as colunas do perfil, ainda como texto"""
+        options = {
+            'sep': profile['separador'],
+            'encoding': profile['codificacao'],
+            'skiprows': profile['linhas_ignoradas']
+        }
+        header = pd.read_csv(file_path, nrows=0, **options).columns
+        columns = self._check_columns(set(header), profile)
+        
+        yield from pd.read_csv(file_path, usecols=columns, dtype=str, chunksize=chunk_size, **options)
+    
+    def _iter_xlsx_chunks(self, file_path, profile, chunk_size):
+        """Blocos de linhas da planilha, lida no modo read_only (streaming) do openpyxl"""
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[profile['aba']] if profile.get('aba') else workbook.active
+            rows = sheet.iter_rows(min_row=profile['linhas_ignoradas'] + 1, values_only=True)
+            header = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+            columns = self._check_columns(set(header), profile)
+            positions = [header.index(column) for column in columns]
+            pick = itemgetter(*positions)
+            width = max(positions) + 1
+            
+            chunk = []
+            for row in rows:
+                # O modo read_only pode entregar linhas mais curtas que o cabeçalho
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                values = pick(row) if len(columns) > 1 else (pick(row),)
+                # Linhas totalmente vazias (comuns no fim das planilhas) são puladas
+                if any(value is not None for value in values):
+                    chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    yield pd.DataFrame(chunk, columns=columns)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=columns)
+        finally:
+            workbook.close()
+    
+    def _convert_chunk(self, raw, profile, conta, origem):
+        """Converte um bloco bruto para o formato de transações, com operações vetorizadas"""
+        columns = profile['colunas']
+        
+        def column(field):
+            name = columns.get(field)
+            if name is None or name not in raw.columns:
+                return pd.Series([None] * len(raw), index=raw.index, dtype=object)
+            return raw[name]
+        
+        dates = pd.to_datetime(column('data'), format=profile['formato_data'], errors='coerce')
+        if 'valor' in columns:
+            valores = convert_amounts(column('valor'), profile['decimal'], profile['milhar'])
+        else:
+            credits = convert_amounts(column('credito'), profile['decimal'], profile['milhar'])
+            debits = convert_amounts(column('debito'), profile['decimal'], profile['milhar'])
+            # Débito pode vir com ou sem sinal; uma das colunas costuma ficar vazia
+            valores = credits.fillna(0).abs() - debits.fillna(0).abs()
+            valores[credits.isna() & debits.isna()] = np.nan
+        
+        descriptions = column('descricao').fillna('').astype(str).str.strip()
+        descriptions = descriptions.where(descriptions != '', "Transação sem descrição")
+        
+        categories = column('categoria').fillna('').astype(str)
+        missing = (categories == '').to_numpy()
+        if missing.any():
+            # Descrições se repetem muito: categoriza cada uma só uma vez
+            codes, uniques = pd.factorize(descriptions[missing])
+            categorized = np.array([self._ofx_parser._categorize_transaction(d) for d in uniques] or [''], dtype=object)
+            categories[missing] = categorized[codes]
+        
+        if conta is None:
+            accounts = column('conta').fillna(profile.get('conta', '')).astype(str).to_numpy()
+        else:
+            accounts = conta
+        
+        valores = valores.to_numpy(dtype=float)
+        frame = pd.DataFrame({
+            'data': dates.dt.normalize().to_numpy(),
+            'descricao': descriptions.to_numpy(),
+            'valor': valores,
+            'categoria': categories.to_numpy(),
+            'tipo': np.where(valores > 0, "Receita", "Despesa"),
+            'origem': origem,
+            'fitid': column('fitid').fillna('').astype(str).to_numpy(),
+            'conta': accounts
+        })
+        
+        valid = frame['data'].notna() & ~np.isnan(valores)
+        if not valid.all():
+            print(f"{int((~valid).sum())} transações com data ou valor inválido ignoradas")
+            frame = frame[valid].reset_index(drop=True)
+        
+        return frame
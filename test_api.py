@@ -1,13 +1,93 @@
 #!/usr/bin/env python3
 """
 Script de teste para verificar se a API está funcionando
+
+Uso:
+    python test_api.py                       # testes funcionais em http://localhost:5000
+    python test_api.py --load --start-server --clients 16 --duration 20 --output carga.json
 """
 
 import requests
+import argparse
+import gzip
 import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
 import time
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Mistura padrão do modo de carga: operação -> peso relativo
+DEFAULT_LOAD_MIX = {'dashboard': 5, 'transactions': 4, 'bulk': 1, 'process_ofx': 1}
+
+DESCRIPTIONS = ['SUPERMERCADO ABC', 'UBER *TRIP', 'PIX RECEBIDO', 'FARMACIA SAO JOAO',
+                'NETFLIX.COM', 'POSTO SHELL', 'PADARIA CENTRAL', 'PAGAMENTO BOLETO']
+
+def synthetic_transactions(rng, count):
+    """Transações aleatórias dos últimos 90 dias"""
+    today = datetime.now()
+    return [{
+        "data": (today - timedelta(days=rng.randint(0, 90))).strftime('%Y-%m-%d'),
+        "descricao": f"{rng.choice(DESCRIPTIONS)} {rng.randint(1000, 9999)}",
+        "valor": round(rng.uniform(-500, 500), 2)
+    } for _ in range(count)]
+
+def synthetic_ofx(rng, count):
+    """Arquivo OFX 1.x (SGML) em bytes com transações aleatórias"""
+    lines = ["OFXHEADER:100", "DATA:OFXSGML", "VERSION:102", "ENCODING:USASCII", "CHARSET:1252", "",
+             "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>BRL",
+             "<BANKACCTFROM><BANKID>0001<ACCTID>12345-6<ACCTTYPE>CHECKING</BANKACCTFROM>",
+             "<BANKTRANLIST>"]
+    for i, transaction in enumerate(synthetic_transactions(rng, count)):
+        lines.append(
+            f"<STMTTRN><TRNTYPE>{'CREDIT' if transaction['valor'] > 0 else 'DEBIT'}"
+            f"<DTPOSTED>{transaction['data'].replace('-', '')}120000[-3:BRT]"
+            f"<TRNAMT>{transaction['valor']:.2f}<FITID>{rng.getrandbits(48)}{i}"
+            f"<MEMO>{transaction['descricao']}</STMTTRN>"
+        )
+    lines.append("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>")
+    return "\n".join(lines).encode('ascii')
+
+def percentile(sorted_values, fraction):
+    """Percentil pelo método do posto mais próximo (lista já ordenada)"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def start_local_server(data_dir=None):
+    """
+    Inicia start_api.py em outro processo, em 127.0.0.1 e numa porta livre,
+    com os dados em um diretório temporário
+    
+    Returns:
+        (processo, URL base)
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    
+    data_dir = data_dir or tempfile.mkdtemp(prefix='ofx_api_load_')
+    env = dict(os.environ, API_HOST='127.0.0.1', API_PORT=str(port), API_DEBUG='false')
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'start_api.py')
+    process = subprocess.Popen([sys.executable, script], cwd=data_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("A API local não respondeu em 30 segundos")
 
 class APITester:
     def __init__(self, base_url="http://localhost:5000"):
@@ -159,6 +239,194 @@ class APITester:
             print(f"❌ Erro na adição de transação: {str(e)}")
             return False
     
+    def test_import_ofx_dedup(self):
+        """Testa a importação de OFX: o mesmo arquivo enviado de novo não duplica transações"""
+        print("📥 Testando importação OFX com deduplicação...")
+        try:
+            # FITIDs aleatórios: o arquivo é novo mesmo contra uma API já usada
+            ofx_data = synthetic_ofx(random.Random(), 20)
+            results = []
+            for _ in range(2):
+                files = {'file': ('extrato.ofx', ofx_data, 'application/ofx')}
+                response = self.session.post(f"{self.base_url}/api/import-ofx", files=files)
+                if response.status_code != 200 or not response.json()['success']:
+                    print(f"❌ Importação OFX falhou - Status: {response.status_code}")
+                    return False
+                results.append(response.json()['data'])
+            
+            first, second = results
+            if first['inserted'] != 20 or second['inserted'] != 0 or second['skipped'] != 20:
+                print(f"❌ Deduplicação falhou - 1ª: {first['inserted']} inseridas, "
+                      f"2ª: {second['inserted']} inseridas e {second['skipped']} ignoradas")
+                return False
+            print(f"✅ Importação OFX OK - 20 inseridas, reenvio com {second['skipped']} ignoradas")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na importação OFX: {str(e)}")
+            return False
+    
+    def test_import_ofx_batch(self):
+        """Testa a importação de vários arquivos OFX de uma vez"""
+        print("📦 Testando importação OFX em lote...")
+        try:
+            rng = random.Random()
+            files = [('files', (f'extrato_{i}.ofx', synthetic_ofx(rng, 10 + i), 'application/ofx'))
+                     for i in range(3)]
+            response = self.session.post(f"{self.base_url}/api/import-ofx/batch", files=files)
+            if response.status_code != 200 or not response.json()['success']:
+                print(f"❌ Importação em lote falhou - Status: {response.status_code}")
+                return False
+            
+            data = response.json()['data']
+            totals = [f['total'] for f in data['files']]
+            errors = [f['erro'] for f in data['files'] if f['erro']]
+            if totals != [10, 11, 12] or errors or data['inserted'] != 33:
+                print(f"❌ Importação em lote incorreta - totais {totals}, erros {errors}, "
+                      f"{data['inserted']} inseridas")
+                return False
+            
+            # Arquivo inválido: erro no resultado dele; sozinho no lote, a importação falha
+            invalid = ('files', ('invalido.ofx', b'isto nao e um OFX', 'application/ofx'))
+            mixed = self.session.post(f"{self.base_url}/api/import-ofx/batch",
+                                      files=[invalid, ('files', ('extrato.ofx', synthetic_ofx(rng, 5), 'application/ofx'))])
+            alone = self.session.post(f"{self.base_url}/api/import-ofx/batch", files=[invalid])
+            mixed_files = mixed.json()['data']['files']
+            if mixed.status_code != 200 or not mixed_files[0]['erro'] or mixed_files[1]['erro'] \
+                    or alone.status_code != 400:
+                print(f"❌ Arquivo inválido no lote não foi rejeitado - {mixed_files}, "
+                      f"sozinho: status {alone.status_code}")
+                return False
+            print(f"✅ Importação em lote OK - {len(totals)} arquivos, {data['inserted']} transações; "
+                  f"arquivo inválido rejeitado")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na importação em lote: {str(e)}")
+            return False
+    
+    def test_search_digits(self):
+        """Testa a busca por números na descrição e a busca sem palavras indexáveis"""
+        print("🔢 Testando busca por números...")
+        try:
+            number = str(random.randint(10 ** 8, 10 ** 9 - 1))
+            transaction = {
+                "data": datetime.now().strftime('%Y-%m-%d'),
+                "descricao": f"CARTAO FINAL {number}",
+                "valor": -10.00
+            }
+            self.session.post(f"{self.base_url}/api/transactions", json=transaction)
+            
+            totals = {}
+            for q in (number, '*'):
+                response = self.session.get(f"{self.base_url}/api/transactions", params={'q': q})
+                if response.status_code != 200:
+                    print(f"❌ Busca por '{q}' falhou - Status: {response.status_code}")
+                    return False
+                totals[q] = response.json()['data']['pagination']['total']
+            
+            if totals[number] != 1 or totals['*'] != 0:
+                print(f"❌ Busca incorreta - '{number}': {totals[number]} (esperado 1), "
+                      f"'*': {totals['*']} (esperado 0)")
+                return False
+            print(f"✅ Busca por números OK - '{number}' encontrou 1, '*' nenhuma")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na busca por números: {str(e)}")
+            return False
+    
+    def test_export(self):
+        """Testa a exportação em CSV com filtro de busca"""
+        print("📤 Testando exportação...")
+        try:
+            expected = self.session.get(f"{self.base_url}/api/transactions",
+                                        params={'q': 'padaria', 'limit': 1})
+            total = expected.json()['data']['pagination']['total']
+            
+            response = self.session.get(f"{self.base_url}/api/export",
+                                        params={'format': 'csv', 'q': 'padaria'})
+            if response.status_code != 200:
+                print(f"❌ Exportação falhou - Status: {response.status_code}")
+                return False
+            
+            lines = response.content.decode('utf-8').splitlines()
+            rows = lines[1:]
+            if not lines or not lines[0].startswith('data,descricao,valor'):
+                print("❌ Exportação sem o cabeçalho CSV esperado")
+                return False
+            if len(rows) != total or any('padaria' not in row.lower() for row in rows):
+                print(f"❌ Exportação com {len(rows)} linhas, esperado {total} com 'padaria'")
+                return False
+            print(f"✅ Exportação OK - {len(rows)} linhas, iguais às de /api/transactions")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na exportação: {str(e)}")
+            return False
+    
+    def test_aggregate(self):
+        """Testa a agregação por mês contra o total de transações"""
+        print("🧮 Testando agregação...")
+        try:
+            response = self.session.get(f"{self.base_url}/api/aggregate",
+                                        params={'group_by': 'month', 'metrics': 'sum,count'})
+            dashboard = self.session.get(f"{self.base_url}/api/dashboard").json()['data']
+            if response.status_code != 200 or not response.json()['success']:
+                print(f"❌ Agregação falhou - Status: {response.status_code}")
+                return False
+            
+            rows = response.json()['data']['rows']
+            count = sum(row['count'] for row in rows)
+            soma = sum(row['sum'] for row in rows)
+            if count != dashboard['total_transactions'] or abs(soma - dashboard['current_balance']) > 0.01:
+                print(f"❌ Agregação não bate com o dashboard - {count} transações e R$ {soma:.2f}, "
+                      f"esperado {dashboard['total_transactions']} e R$ {dashboard['current_balance']:.2f}")
+                return False
+            print(f"✅ Agregação OK - {len(rows)} meses, {count} transações")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na agregação: {str(e)}")
+            return False
+    
+    def test_conditional_get(self):
+        """Testa o ETag: repetir a requisição com If-None-Match responde 304"""
+        print("🏷️ Testando requisição condicional...")
+        try:
+            response = self.session.get(f"{self.base_url}/api/dashboard")
+            etag = response.headers.get('ETag')
+            if not etag:
+                print("❌ Resposta sem ETag")
+                return False
+            
+            cached = self.session.get(f"{self.base_url}/api/dashboard", headers={'If-None-Match': etag})
+            if cached.status_code != 304 or cached.content:
+                print(f"❌ Requisição condicional falhou - Status: {cached.status_code}")
+                return False
+            print(f"✅ Requisição condicional OK - 304 para {etag}")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na requisição condicional: {str(e)}")
+            return False
+    
+    def test_gzip(self):
+        """Testa a compressão gzip de uma resposta JSON grande"""
+        print("🗜️ Testando compressão gzip...")
+        try:
+            response = self.session.get(f"{self.base_url}/api/transactions", params={'limit': 100},
+                                        headers={'Accept-Encoding': 'gzip'}, stream=True)
+            compressed = response.raw.read()
+            encoding = response.headers.get('Content-Encoding')
+            if response.status_code != 200 or encoding != 'gzip':
+                print(f"❌ Resposta sem gzip - Status: {response.status_code}, Content-Encoding: {encoding}")
+                return False
+            
+            data = json.loads(gzip.decompress(compressed))
+            if not data['success']:
+                print(f"❌ Resposta comprimida inválida: {data['error']}")
+                return False
+            print(f"✅ Compressão gzip OK - {len(compressed)} bytes comprimidos")
+            return True
+        except Exception as e:
+            print(f"❌ Erro na compressão gzip: {str(e)}")
+            return False
+    
     def run_all_tests(self):
         """Executa todos os testes"""
         print("🚀 Iniciando testes da API...")
@@ -170,7 +438,14 @@ class APITester:
             ("Busca de Transações", self.test_get_transactions),
             ("Dashboard", self.test_get_dashboard),
             ("Busca de Categorias", self.test_get_categories),
-            ("Adição de Transação", self.test_add_transaction)
+            ("Adição de Transação", self.test_add_transaction),
+            ("Importação OFX", self.test_import_ofx_dedup),
+            ("Importação OFX em Lote", self.test_import_ofx_batch),
+            ("Busca por Números", self.test_search_digits),
+            ("Exportação", self.test_export),
+            ("Agregação", self.test_aggregate),
+            ("Requisição Condicional", self.test_conditional_get),
+            ("Compressão gzip", self.test_gzip)
         ]
         
         results = []
@@ -206,29 +481,223 @@ class APITester:
             print("⚠️ Alguns testes falharam. Verifique a configuração da API.")
         
         return passed == total
+    
+    # Modo de carga
+    
+    def seed_transactions(self, count, batch_size=1000, seed=42):
+        """Insere transações sintéticas antes do teste de carga"""
+        rng = random.Random(seed)
+        for start in range(0, count, batch_size):
+            response = self.session.post(
+                f"{self.base_url}/api/transactions/bulk",
+                json={'transactions': synthetic_transactions(rng, min(batch_size, count - start))}
+            )
+            response.raise_for_status()
+    
+    def _load_request(self, session, operation, rng, bulk_size, ofx_data):
+        """Executa uma operação do teste de carga e retorna a resposta"""
+        if operation == 'dashboard':
+            return session.get(f"{self.base_url}/api/dashboard")
+        if operation == 'transactions':
+            return session.get(f"{self.base_url}/api/transactions",
+                               params={'limit': 100, 'offset': rng.randint(0, 10) * 100})
+        if operation == 'bulk':
+            return session.post(f"{self.base_url}/api/transactions/bulk",
+                                json={'transactions': synthetic_transactions(rng, bulk_size)})
+        if operation == 'process_ofx':
+            files = {'file': ('carga.ofx', ofx_data, 'application/ofx')}
+            return session.post(f"{self.base_url}/api/process-ofx", files=files)
+        raise ValueError(f"Operação desconhecida: {operation}")
+    
+    def load_test(self, clients=8, duration=30.0, max_requests=None, mix=None,
+                  bulk_size=50, ofx_transactions=200, seed=42):
+        """
+        Gera carga com clientes concorrentes e mede latência e erros
+        
+        Cada cliente é uma thread com a própria sessão HTTP, que sorteia a
+        próxima operação de acordo com os pesos de `mix` até acabar o tempo
+        (duration, em segundos) ou o total de requisições (max_requests).
+        
+        Returns:
+            dict com a configuração, vazão, erros e percentis de latência
+            (em ms) no total e por operação
+        """
+        mix = mix or DEFAULT_LOAD_MIX
+        operations = list(mix)
+        weights = [mix[operation] for operation in operations]
+        ofx_data = synthetic_ofx(random.Random(seed), ofx_transactions)
+        
+        samples = []  # (operação, latência em segundos, sucesso)
+        samples_lock = threading.Lock()
+        issued = [0]
+        deadline = time.perf_counter() + duration
+        
+        def client(index):
+            rng = random.Random(seed + index)
+            session = requests.Session()
+            local = []
+            while time.perf_counter() < deadline:
+                if max_requests is not None:
+                    with samples_lock:
+                        if issued[0] >= max_requests:
+                            break
+                        issued[0] += 1
+                operation = rng.choices(operations, weights)[0]
+                start = time.perf_counter()
+                try:
+                    response = self._load_request(session, operation, rng, bulk_size, ofx_data)
+                    ok = response.status_code < 400
+                except requests.exceptions.RequestException:
+                    ok = False
+                local.append((operation, time.perf_counter() - start, ok))
+            with samples_lock:
+                samples.extend(local)
+        
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        def summarize(selected):
+            latencies = sorted(latency * 1000 for _, latency, _ in selected)
+            errors = sum(1 for _, _, ok in selected if not ok)
+            return {
+                'requests': len(selected),
+                'errors': errors,
+                'error_rate': errors / len(selected) if selected else 0.0,
+                'throughput_rps': len(selected) / elapsed if elapsed else 0.0,
+                'latency_ms': {
+                    'p50': percentile(latencies, 0.50),
+                    'p95': percentile(latencies, 0.95),
+                    'p99': percentile(latencies, 0.99),
+                    'max': latencies[-1] if latencies else None
+                }
+            }
+        
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'base_url': self.base_url,
+            'config': {
+                'clients': clients, 'duration': duration, 'max_requests': max_requests,
+                'mix': mix, 'bulk_size': bulk_size, 'ofx_transactions': ofx_transactions, 'seed': seed
+            },
+            'elapsed_s': elapsed,
+            'total': summarize(samples),
+            'operations': {
+                operation: summarize([sample for sample in samples if sample[0] == operation])
+                for operation in operations
+            }
+        }
+
+def print_load_report(report):
+    """Mostra o resultado do teste de carga em forma de tabela"""
+    config = report['config']
+    print(f"\n📈 Carga: {config['clients']} clientes, {report['elapsed_s']:.1f}s")
+    print(f"{'Operação':<14}{'Req':>8}{'Erros':>7}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = list(report['operations'].items()) + [('total', report['total'])]
+    for name, result in rows:
+        if not result['requests']:
+            continue
+        latency = result['latency_ms']
+        print(f"{name:<14}{result['requests']:>8}{result['errors']:>7}{result['throughput_rps']:>9.1f}"
+              f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}")
+
+def parse_mix(text):
+    """Converte 'dashboard=5,bulk=1' em {'dashboard': 5, 'bulk': 1}"""
+    mix = {}
+    for item in text.split(','):
+        operation, _, weight = item.partition('=')
+        if operation.strip() not in DEFAULT_LOAD_MIX:
+            raise argparse.ArgumentTypeError(f"Operação desconhecida: {operation}")
+        mix[operation.strip()] = float(weight or 1)
+    return mix
+
+def run_load_mode(args):
+    """Executa o modo de carga a partir dos argumentos da linha de comando"""
+    server = None
+    base_url = args.url
+    if args.start_server:
+        server, base_url = start_local_server()
+        print(f"🚀 API local iniciada em {base_url}")
+    
+    try:
+        tester = APITester(base_url)
+        if args.seed_transactions:
+            print(f"🌱 Inserindo {args.seed_transactions} transações sintéticas...")
+            tester.seed_transactions(args.seed_transactions, seed=args.seed)
+        
+        report = tester.load_test(args.clients, args.duration, args.requests, args.mix,
+                                  args.bulk_size, args.ofx_transactions, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    
+    print_load_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultado salvo em {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False))
+    return report['total']['errors'] == 0
 
 def main():
     """Função principal"""
+    arg_parser = argparse.ArgumentParser(description="Testes e teste de carga da API de Processamento OFX")
+    arg_parser.add_argument('--url', default="http://localhost:5000", help="URL base da API")
+    arg_parser.add_argument('--load', action='store_true', help="modo de carga em vez dos testes funcionais")
+    arg_parser.add_argument('--start-server', action='store_true',
+                            help="inicia uma API local (127.0.0.1, dados temporários) para o teste")
+    arg_parser.add_argument('--clients', type=int, default=8, help="clientes concorrentes")
+    arg_parser.add_argument('--duration', type=float, default=30.0, help="duração em segundos")
+    arg_parser.add_argument('--requests', type=int, default=None, help="total máximo de requisições")
+    arg_parser.add_argument('--mix', type=parse_mix, default=None,
+                            help="pesos das operações, ex.: dashboard=5,transactions=4,bulk=1,process_ofx=1")
+    arg_parser.add_argument('--bulk-size', type=int, default=50, help="transações por inserção em lote")
+    arg_parser.add_argument('--ofx-transactions', type=int, default=200, help="transações no OFX enviado")
+    arg_parser.add_argument('--seed-transactions', type=int, default=0,
+                            help="transações sintéticas inseridas antes da carga")
+    arg_parser.add_argument('--seed', type=int, default=42, help="semente dos dados sintéticos")
+    arg_parser.add_argument('--output', help="arquivo JSON para o resultado do teste de carga")
+    args = arg_parser.parse_args()
+    
+    if args.load:
+        return run_load_mode(args)
+    
     print("🧪 Testador da API de Processamento OFX")
     print("=" * 50)
     
+    server = None
+    if args.start_server:
+        server, args.url = start_local_server()
+        print(f"🚀 API local iniciada em {args.url}")
+    
     # Verificar se a API está rodando
-    tester = APITester()
+    tester = APITester(args.url)
     
     try:
-        # Tentar conectar com a API
-        response = requests.get("http://localhost:5000/health", timeout=5)
-        if response.status_code != 200:
-            print("❌ API não está respondendo. Certifique-se de que ela está rodando:")
+        try:
+            # Tentar conectar com a API
+            response = requests.get(f"{args.url}/health", timeout=5)
+            if response.status_code != 200:
+                print("❌ API não está respondendo. Certifique-se de que ela está rodando:")
+                print("   python start_api.py")
+                return False
+        except requests.exceptions.ConnectionError:
+            print("❌ Não foi possível conectar com a API. Certifique-se de que ela está rodando:")
             print("   python start_api.py")
             return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Não foi possível conectar com a API. Certifique-se de que ela está rodando:")
-        print("   python start_api.py")
-        return False
-    
-    # Executar testes
-    success = tester.run_all_tests()
+        
+        # Executar testes
+        success = tester.run_all_tests()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
     
     if success:
         print("\n🎉 API pronta para uso!")
@@ -0,0 +1,14 @@
+import re
+import unicodedata
+
+def normalize_text(text, keep_digits=False):
+    """
+    Normaliza uma descrição: minúsculas, sem acentos, dígitos ou pontuação
+    
+    Com keep_digits=True, os dígitos são mantidos (busca por números de cartão ou documento).
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^a-z0-9 ]+' if keep_digits else r'[^a-z ]+', ' ', text).split())
@@ -1,37 +1,484 @@
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+import bisect
+import hashlib
+import io
 import json
 import os
+import shutil
+import threading
+from backup_reader import BackupReader
+from categorizer import NaiveBayesCategorizer
+from metrics import REGISTRY
+from text_utils import normalize_text
+from transaction_store import TransactionStore
 
-class TransactionManager:
+# Colunas persistidas de cada transação
+COLUMNS = ['data', 'descricao', 'valor', 'categoria', 'tipo', 'origem', 'fitid', 'conta']
+
+CATEGORIZE_SECONDS = REGISTRY.histogram('categorization_seconds', 'Duração da categorização de cada lote, por método')
+CATEGORIZED = REGISTRY.counter('categorized_transactions_total', 'Transações categorizadas, por método')
+
+def _description_similarity(a, b, min_similarity):
+    """Similaridade entre duas descrições normalizadas (0 a 1)"""
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b)
+    # Os limites superiores baratos descartam a maioria dos pares sem o cálculo completo
+    if matcher.real_quick_ratio() < min_similarity or matcher.quick_ratio() < min_similarity:
+        return 0.0
+    return round(matcher.ratio(), 3)
+
+def find_duplicate_pairs(dates, amounts, descriptions, window_days=3, min_similarity=0.6):
+    """
+    Encontra pares de possíveis duplicatas sem comparar todos contra todos
+    
+    As linhas são agrupadas pelo valor em centavos e ordenadas pela data, de
+    modo que cada grupo (valor, janela de dias) fica contíguo. As descrições
+    só são comparadas entre linhas do mesmo grupo.
+    
+    Returns:
+        lista de tuplas (posição_a, posição_b, similaridade)
+    """
+    n = len(amounts)
+    if n < 2:
+        return []
+    
+    cents = np.rint(np.asarray(amounts, dtype=float) * 100).astype(np.int64)
+    days = pd.to_datetime(pd.Series(dates), errors='coerce').values.astype('datetime64[D]').astype(np.int64)
+    order = np.lexsort((days, cents))
+    cents_sorted = cents[order]
+    days_sorted = days[order]
+    
+    # Deslocamento k: compara cada linha com a k-ésima seguinte no mesmo grupo.
+    # Se o par (i, i+k) já saiu da janela, (i, i+k+1) também sai.
+    candidates = []
+    active = np.arange(n - 1)
+    k = 1
+    while active.size:
+        active = active[active + k < n]
+        other = active + k
+        in_bucket = (cents_sorted[active] == cents_sorted[other]) & \
+                    (days_sorted[other] - days_sorted[active] <= window_days)
+        active = active[in_bucket]
+        candidates.append(np.stack([order[active], order[active + k]], axis=1))
+        k += 1
+    
+    # Descrições se repetem muito: normalizar e comparar cada valor distinto uma vez só
+    codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object).fillna(''))
+    normalized = [normalize_text(text) for text in uniques]
+    similarities = {}
+    
+    pairs = []
+    for a, b in np.concatenate(candidates):
+        code_a, code_b = codes[a], codes[b]
+        key = (code_a, code_b) if code_a <= code_b else (code_b, code_a)
+        similarity = similarities.get(key)
+        if similarity is None:
+            similarity = _description_similarity(normalized[key[0]], normalized[key[1]], min_similarity)
+            similarities[key] = similarity
+        if similarity >= min_similarity:
+            pairs.append((int(min(a, b)), int(max(a, b)), similarity))
+    
+    return pairs
+
+class DescriptionIndex:
+    """
+    Índice invertido das descrições, para busca por palavras
+    
+    Cada descrição distinta recebe um código e é normalizada (normalize_text,
+    mantendo os dígitos) e quebrada em tokens uma única vez; o índice guarda token -> códigos e o
+    código de cada linha. Uma busca cruza os códigos dos tokens procurados
+    (poucos) e só então localiza as linhas com uma operação vetorizada.
+    Linhas novas são acrescentadas ao fim com add().
+    """
+    
+    def __init__(self, descriptions=()):
+        self._description_codes = {}
+        self._postings = {}
+        self._vocabulary = None
+        self._chunks = []
+        self._row_codes = np.empty(0, dtype=np.int32)
+        self.size = 0
+        self.add(descriptions)
+    
+    def add(self, descriptions):
+        """Indexa as descrições das próximas linhas, na ordem"""
+        descriptions = pd.Series(descriptions, dtype=object).fillna('')
+        if descriptions.empty:
+            return
+        
+        batch_codes, uniques = pd.factorize(descriptions)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, text in enumerate(uniques):
+            code = self._description_codes.get(text)
+            if code is None:
+                code = len(self._description_codes)
+                self._description_codes[text] = code
+                for token in set(normalize_text(text, keep_digits=True).split()):
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        self._postings[token] = postings = set()
+                        self._vocabulary = None
+                    postings.add(code)
+            mapping[i] = code
+        
+        self._chunks.append(mapping[batch_codes])
+        self.size += len(descriptions)
+    
+    def _codes(self):
+        """Código da descrição de cada linha (os lotes são juntados só na consulta)"""
+        if self._chunks:
+            self._row_codes = np.concatenate([self._row_codes] + self._chunks)
+            self._chunks = []
+        return self._row_codes
+    
+    def _matching_tokens(self, prefix):
+        """Tokens do vocabulário que começam com o prefixo (busca binária no vocabulário ordenado)"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        return self._vocabulary[start:end]
+    
+    def search(self, query):
+        """
+        Posições das linhas cuja descrição contém todas as palavras da busca
+        
+        Cada palavra casa com tokens que começam com ela ('uber' encontra 'ubereats').
+        Uma busca em branco retorna todas as linhas; uma busca só com pontuação
+        (sem nada indexável) não retorna nenhuma.
+        """
+        if not query or not str(query).strip():
+            return np.arange(self.size)
+        tokens = normalize_text(query, keep_digits=True).split()
+        if not tokens:
+            return np.empty(0, dtype=np.int64)
+        
+        matched = None
+        for token in tokens:
+            codes = set()
+            for candidate in self._matching_tokens(token):
+                codes |= self._postings[candidate]
+            matched = codes if matched is None else matched & codes
+            if not matched:
+                return np.empty(0, dtype=np.int64)
+        
+        return np.flatnonzero(np.isin(self._codes(), np.fromiter(matched, dtype=np.int32, count=len(matched))))
+
+# Dimensões e métricas de TransactionManager.aggregate (métrica -> função do pandas)
+AGGREGATE_DIMENSIONS = ('day', 'week', 'month', 'categoria', 'tipo', 'origem', 'conta')
+AGGREGATE_METRICS = {'sum': 'sum', 'count': 'count', 'avg': 'mean', 'min': 'min', 'max': 'max'}
+# Granularidade dos resumos mensais pré-agregados
+ROLLUP_DIMENSIONS = ['month', 'categoria', 'tipo', 'origem', 'conta']
+
+# Máximo de transações enviadas em um evento de inserção (ver add_listener)
+EVENT_MAX_ROWS = 500
+# Transações mais recentes guardadas no resumo de cada shard (ver get_recent_transactions)
+SUMMARY_RECENT_ROWS = 100
+
+# Formatos de TransactionManager.iter_export e seus tipos MIME
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'columns': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# Colunas com poucos valores distintos, enviadas como dicionário no formato colunar
+DICTIONARY_COLUMNS = ('categoria', 'tipo', 'origem', 'conta')
+
+def frame_to_columns(frame):
+    """
+    Formato colunar de um DataFrame de transações: uma lista por coluna, em
+    vez de um dict por transação
+    
+    As colunas de DICTIONARY_COLUMNS viram {'values': valores distintos,
+    'codes': posição do valor de cada transação}. As listas saem direto das
+    colunas (tolist), sem montar objetos por linha.
+    """
+    columns = {}
+    for column in COLUMNS:
+        if column in DICTIONARY_COLUMNS:
+            codes, uniques = pd.factorize(frame[column])
+            columns[column] = {'values': uniques.tolist(), 'codes': codes.tolist()}
+        else:
+            columns[column] = frame[column].tolist()
+    return {'length': len(frame), 'columns': columns}
+
+class _ExportSink(io.RawIOBase):
+    """Destino de escrita que acumula os bytes até serem retirados com drain()"""
+    
     def __init__(self):
-        self.data_file = "transactions.json"
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        # A posição é a total escrita: o Parquet a usa para os offsets do rodapé
+        return self._position
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+class TransactionManager:
+    def __init__(self, data_dir="transactions", max_loaded_shards=16, archive_after_days=365,
+                 use_categorizer=False, categorizer_min_confidence=0.6):
+        self.data_dir = data_dir
+        self.legacy_data_file = "transactions.json"
         self.categories_file = "categories.json"
         self.rules_file = "categorization_rules.json"
-        self.transactions = self._load_transactions()
+        self.accounts_file = "accounts.json"
+        self.categorizer_file = "categorizer_model.json"
+        self._lock = threading.RLock()
+        # Transações ficam em um shard por conta, carregado só quando usado; as
+        # mais antigas que archive_after_days vão para arquivos anuais compactados
+        self.store = TransactionStore(data_dir, COLUMNS, max_loaded_shards, archive_after_days)
+        # Resumos pequenos de cada shard (dashboard e agregados), sem manter as transações em memória
+        self._summaries = {}
+        self._rollups = {}
+        # Alterações fora do store (categorias, regras, contas, trocas do store)
+        self._version_offset = 0
+        self._listeners = []
         self.categories = self._load_categories()
         self.categorization_rules = self._load_categorization_rules()
+        self.accounts = self._load_accounts()
+        self._migrate_legacy_file()
+        # Categorizador estatístico opcional, usado depois das regras para o que ficou em "Outros"
+        self.categorizer = NaiveBayesCategorizer(self.categorizer_file) if use_categorizer else None
+        self.categorizer_min_confidence = categorizer_min_confidence
+        self._categorizer_ready = False
     
-    def _load_transactions(self):
-        """Carrega transações do arquivo JSON"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return pd.DataFrame(data)
-            return pd.DataFrame(columns=['data', 'descricao', 'valor', 'categoria', 'tipo', 'origem'])
-        except:
-            return pd.DataFrame(columns=['data', 'descricao', 'valor', 'categoria', 'tipo', 'origem'])
+    @property
+    def data_version(self):
+        """
+        Versão dos dados: aumenta a cada alteração de transações, categorias,
+        regras ou contas, e nunca volta atrás
+        """
+        return self._version_offset + self.store.version
+    
+    def _touch(self):
+        """Registra uma alteração que não passa pelo store"""
+        self._version_offset += 1
+    
+    def add_listener(self, callback):
+        """
+        Registra uma função chamada após cada gravação, com (evento, dados, versão)
+        
+        Eventos:
+            'transactions': transações inseridas (até EVENT_MAX_ROWS), saldo e
+                total atualizados e as variações de receitas, despesas e saldo do mês
+            'reset': os dados foram substituídos (import_data); traz os
+                valores completos do dashboard
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event, data):
+        for callback in self._listeners:
+            try:
+                callback(event, data, self.data_version)
+            except Exception as e:
+                print(f"Erro ao notificar alteração: {str(e)}")
+    
+    def _notify_inserted(self, frame):
+        """Avisa os ouvintes sobre transações inseridas; não faz nada se não houver ouvintes"""
+        if not self._listeners or frame.empty:
+            return
+        
+        balance_change, income, expenses = self._month_totals(frame)
+        self._notify('transactions', {
+            'transactions': frame.iloc[-EVENT_MAX_ROWS:].to_dict('records'),
+            'inserted': len(frame),
+            'current_balance': self.get_current_balance(),
+            'total_transactions': self.get_total_transactions(),
+            'delta': {
+                'balance_change': balance_change,
+                'monthly_income': income,
+                'monthly_expenses': expenses
+            }
+        })
+    
+    @property
+    def transactions(self):
+        """
+        Transações recentes (não arquivadas) de todas as contas, juntando os shards
+        
+        A junção é montada a cada chamada e não fica guardada, para que a memória
+        ocupada pelas transações continue limitada pelo LRU do store. Consultas
+        por período devem usar get_filtered_transactions, que inclui as
+        partições arquivadas do período pedido.
+        """
+        with self._lock:
+            return self._concat_frames(frame for _, frame in self._iter_shards())
+    
+    def _shards_fit(self):
+        """Se todos os shards cabem juntos no LRU do store"""
+        return len(self.store.shard_ids()) <= self.store.max_loaded_shards
+    
+    def _iter_shards(self, shard_ids=None):
+        """
+        Percorre as transações recentes de cada conta
+        
+        Se todos os shards cabem no LRU, eles são carregados nele e as
+        consultas seguintes não voltam ao disco; senão, são lidos sem entrar
+        nele, para não expulsar as contas em uso.
+        """
+        shard_ids = self.store.shard_ids() if shard_ids is None else shard_ids
+        if not self._shards_fit():
+            return self.store.iter_frames(shard_ids)
+        return ((shard_id, self.store.load(shard_id)) for shard_id in shard_ids)
+    
+    def _concat_frames(self, frames):
+        """Junta DataFrames de transações, ignorando os vazios"""
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+    
+    def _shard_summary(self, conta):
+        """
+        Resumo de um shard: totais do mês atual, as transações mais recentes e o resumo mensal
+        
+        Refeito só quando o shard muda ou o mês vira; shards fora do LRU são
+        lidos sem entrar nele.
+        """
+        month = datetime.now().month
+        summary = self._summaries.get(conta)
+        if summary is not None and summary['version'] == self.store.shard_version(conta) \
+                and summary['month'] == month:
+            return summary
+        
+        frame = next(self._iter_shards([conta]))[1]
+        # A leitura pode arquivar linhas antigas; a versão é lida depois dela
+        summary = {
+            'version': self.store.shard_version(conta),
+            'month': month,
+            'totals': self._month_totals(frame),
+            'recent': frame.sort_values('data', ascending=False).head(SUMMARY_RECENT_ROWS),
+            'rollup': self._monthly_rollup(frame)
+        }
+        self._summaries[conta] = summary
+        return summary
+    
+    def _shard_summaries(self):
+        """Resumos de todos os shards, descartando os de shards que não existem mais"""
+        with self._lock:
+            shard_ids = self.store.shard_ids()
+            summaries = [self._shard_summary(conta) for conta in shard_ids]
+            self._summaries = dict(zip(shard_ids, summaries))
+            return summaries
+    
+    def _transactions_in_range(self, data_inicio=None, data_fim=None, conta=None):
+        """
+        Transações recentes mais as das partições arquivadas que cobrem o período
+        
+        Só os arquivos anuais que têm transações entre data_inicio e data_fim são lidos.
+        """
+        start = pd.to_datetime(data_inicio).strftime('%Y-%m-%d') if data_inicio else None
+        end = pd.to_datetime(data_fim).strftime('%Y-%m-%d') if data_fim else None
+        
+        with self._lock:
+            if conta is None:
+                # Cada shard é recortado no período antes da junção
+                recent = self._concat_frames(self._between(frame, start, end) for _, frame in self._iter_shards())
+            else:
+                recent = self.store.load(conta)
+            shard_ids = None if conta is None else [conta]
+            archived = [frame for _, frame in self.store.iter_archive(shard_ids, start, end)]
+        
+        if not archived:
+            return recent
+        frames = [frame for frame in [recent] + archived if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else recent
+    
+    def _between(self, frame, start=None, end=None):
+        """Linhas com data (texto AAAA-MM-DD) entre start e end, inclusive"""
+        if start:
+            frame = frame[frame['data'] >= start]
+        if end:
+            frame = frame[frame['data'].str[:10] <= end]
+        return frame
+    
+    def _search_transactions(self, q, data_inicio=None, data_fim=None, conta=None):
+        """Mesmo que _transactions_in_range, só com as transações cuja descrição casa com a busca"""
+        start = pd.to_datetime(data_inicio).strftime('%Y-%m-%d') if data_inicio else None
+        end = pd.to_datetime(data_fim).strftime('%Y-%m-%d') if data_fim else None
+        
+        with self._lock:
+            if conta is None:
+                load = self._shards_fit()
+                found = [self._search_shard(shard_id, q, load) for shard_id in self.store.shard_ids()]
+                found = [self._concat_frames(found)]
+            else:
+                found = [self._search_shard(conta, q)]
+            
+            # Partições arquivadas são frias: indexadas só para esta consulta
+            shard_ids = None if conta is None else [conta]
+            for _, frame in self.store.iter_archive(shard_ids, start, end):
+                found.append(frame.iloc[DescriptionIndex(frame['descricao']).search(q)])
+        
+        return pd.concat(found, ignore_index=True) if len(found) > 1 else found[0]
     
-    def _save_transactions(self):
-        """Salva transações no arquivo JSON"""
+    def _search_shard(self, conta, q, load=True):
+        """
+        Transações recentes de um shard que casam com a busca
+        
+        O índice de um shard carregado fica no cache dele; com load=False, um
+        shard fora do LRU é lido e indexado só para esta consulta.
+        """
+        cache = self.store.cache(conta, load=load)
+        if cache is None:
+            frame = next(self.store.iter_frames([conta]))[1]
+            return frame.iloc[DescriptionIndex(frame['descricao']).search(q)]
+        
+        frame = self.store.load(conta)
+        if 'search_index' not in cache:
+            cache['search_index'] = DescriptionIndex(frame['descricao'])
+        return frame.iloc[cache['search_index'].search(q)]
+    
+    def archive_old_transactions(self):
+        """Move para o arquivo as transações que passaram do horizonte em todas as contas"""
+        with self._lock:
+            self.store.archive()
+    
+    def _migrate_legacy_file(self):
+        """Divide o antigo transactions.json em shards por conta (executado uma única vez)"""
+        if not os.path.exists(self.legacy_data_file) or os.path.isdir(self.data_dir):
+            return
+        
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.transactions.to_dict('records'), f, indent=2, ensure_ascii=False)
+            with open(self.legacy_data_file, 'r', encoding='utf-8') as f:
+                frame = self._normalize_frame(pd.DataFrame(json.load(f)))
+            self._replace_transactions(frame)
+            os.replace(self.legacy_data_file, self.legacy_data_file + '.migrated')
         except Exception as e:
-            print(f"Erro ao salvar transações: {str(e)}")
+            print(f"Erro ao migrar transações: {str(e)}")
+    
+    def _normalize_frame(self, frame):
+        """Garante as colunas esperadas (dados antigos não têm 'fitid' nem 'conta')"""
+        for column in ('fitid', 'conta'):
+            if column not in frame.columns:
+                frame[column] = ''
+            else:
+                frame[column] = frame[column].fillna('')
+        return frame
+    
+    def _replace_transactions(self, frame):
+        """Substitui todas as transações salvas pelas de um DataFrame"""
+        with self._lock:
+            self.store.clear()
+            for conta, part in frame.groupby('conta', sort=False):
+                self.store.replace(conta, part)
+            self.store.archive()
     
     def _load_categories(self):
         """Carrega categorias do arquivo JSON"""
@@ -54,6 +501,7 @@ class TransactionManager:
         try:
             with open(self.categories_file, 'w', encoding='utf-8') as f:
                 json.dump(self.categories, f, indent=2, ensure_ascii=False)
+            self._touch()
         except Exception as e:
             print(f"Erro ao salvar categorias: {str(e)}")
     
@@ -67,16 +515,36 @@ class TransactionManager:
         except:
             return {}
     
+    def _load_accounts(self):
+        """Carrega os dados das contas (tipo, banco e último saldo do extrato)"""
+        try:
+            if os.path.exists(self.accounts_file):
+                with open(self.accounts_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return {}
+        except:
+            return {}
+    
+    def _save_accounts(self):
+        """Salva os dados das contas no arquivo JSON"""
+        try:
+            with open(self.accounts_file, 'w', encoding='utf-8') as f:
+                json.dump(self.accounts, f, indent=2, ensure_ascii=False)
+            self._touch()
+        except Exception as e:
+            print(f"Erro ao salvar contas: {str(e)}")
+    
     def _save_categorization_rules(self):
         """Salva regras de categorização no arquivo JSON"""
         try:
             with open(self.rules_file, 'w', encoding='utf-8') as f:
                 json.dump(self.categorization_rules, f, indent=2, ensure_ascii=False)
+            self._touch()
         except Exception as e:
             print(f"Erro ao salvar regras: {str(e)}")
     
-    def add_transaction(self, transaction):
-        """Adiciona uma transação"""
+    def _prepare_transaction(self, transaction):
+        """Completa os campos opcionais de uma transação antes de inseri-la"""
         # Aplicar regras de categorização se não houver categoria
         if 'categoria' not in transaction or not transaction['categoria']:
             transaction['categoria'] = self._apply_categorization_rules(transaction['descricao'])
@@ -85,92 +553,363 @@ class TransactionManager:
         if 'origem' not in transaction:
             transaction['origem'] = 'Manual'
         
-        # Converter para DataFrame e adicionar
-        new_transaction = pd.DataFrame([transaction])
-        if self.transactions.empty:
-            self.transactions = new_transaction
-        else:
-            self.transactions = pd.concat([self.transactions, new_transaction], ignore_index=True)
-        self._save_transactions()
+        # Deduzir tipo pelo sinal do valor, como faz o parser OFX
+        if not transaction.get('tipo'):
+            transaction['tipo'] = "Receita" if float(transaction.get('valor') or 0) > 0 else "Despesa"
+        
+        if not transaction.get('fitid'):
+            transaction['fitid'] = ''
+        
+        if not transaction.get('conta'):
+            transaction['conta'] = ''
+        
+        return transaction
+    
+    def _prepare_frame(self, frame):
+        """Versão vetorizada de _prepare_transaction para um lote em DataFrame"""
+        frame = frame.copy()
+        for column in COLUMNS:
+            if column not in frame.columns:
+                frame[column] = None
+        
+        # Datas em datetime64 (ex.: OFXParser.parse_ofx_to_frame) viram o texto salvo, sem strftime por linha
+        if pd.api.types.is_datetime64_any_dtype(frame['data']):
+            frame['data'] = frame['data'].values.astype('datetime64[D]').astype(str)
+        
+        frame['valor'] = pd.to_numeric(frame['valor'])
+        
+        missing = frame['categoria'].isna() | (frame['categoria'] == '')
+        if missing.any():
+            with CATEGORIZE_SECONDS.time(method='regras'):
+                frame.loc[missing, 'categoria'] = [
+                    self._apply_categorization_rules(d) for d in frame.loc[missing, 'descricao']
+                ]
+            CATEGORIZED.inc(int(missing.sum()), method='regras')
+        
+        missing = frame['tipo'].isna() | (frame['tipo'] == '')
+        if missing.any():
+            frame.loc[missing, 'tipo'] = np.where(frame.loc[missing, 'valor'] > 0, "Receita", "Despesa")
+        
+        frame['origem'] = frame['origem'].fillna('Manual')
+        frame['fitid'] = frame['fitid'].fillna('')
+        frame['conta'] = frame['conta'].fillna('')
+        return frame[COLUMNS].reset_index(drop=True)
+    
+    def _append_frame(self, frame, keys=None):
+        """Grava um lote de transações já preparadas, uma escrita por conta, e o retorna como gravado"""
+        if keys is None:
+            keys = self._frame_keys(frame)
+        frame = self._apply_categorizer(frame)
+        keys = np.asarray(keys, dtype=object)
+        
+        for conta, positions in frame.groupby('conta', sort=False).indices.items():
+            part = frame.iloc[positions]
+            self.store.append(conta, part)
+            # Os índices por conta só existem para shards carregados; os demais são refeitos ao carregar
+            cache = self.store.cache(conta, load=False)
+            if cache is not None and 'import_keys' in cache:
+                cache['import_keys'].update(keys[positions])
+            if cache is not None and 'search_index' in cache:
+                cache['search_index'].add(part['descricao'])
+        return frame
+    
+    def add_transaction(self, transaction):
+        """Adiciona uma transação"""
+        with self._lock:
+            transaction = self._prepare_transaction(transaction)
+            self._notify_inserted(self._append_frame(pd.DataFrame([transaction])[COLUMNS]))
     
     def add_transactions(self, transactions):
         """Adiciona múltiplas transações"""
-        for transaction in transactions:
-            self.add_transaction(transaction)
+        if not transactions:
+            return
+        
+        with self._lock:
+            rows = [self._prepare_transaction(t) for t in transactions]
+            self._notify_inserted(self._append_frame(pd.DataFrame(rows)[COLUMNS]))
     
-    def get_current_balance(self):
-        """Calcula o saldo atual"""
-        if self.transactions.empty:
-            return 0.0
-        return self.transactions['valor'].sum()
+    def import_transactions(self, transactions, skip_possible_duplicates=False,
+                            window_days=3, min_similarity=0.6):
+        """
+        Adiciona transações importadas ignorando as que já existem
+        
+        Cada transação é identificada pelo FITID do OFX ou, na falta dele, por
+        um hash de data, valor e descrição. A consulta ao índice é O(1) por linha.
+        
+        As transações novas também são comparadas com as salvas de mesmo valor
+        em uma janela de dias (ver find_duplicate_pairs), para detectar
+        reexportações com descrição ligeiramente diferente.
+        
+        Returns:
+            dict com o número de transações inseridas e ignoradas e a lista de
+            possíveis duplicatas
+        """
+        return self.import_frame(
+            pd.DataFrame(list(transactions)), skip_possible_duplicates, window_days, min_similarity
+        )
     
-    def get_balance_change(self):
-        """Calcula a mudança no saldo do mês atual"""
-        if self.transactions.empty:
-            return 0.0
+    def import_frame(self, frame, skip_possible_duplicates=False, window_days=3, min_similarity=0.6):
+        """
+        Mesmo que import_transactions, recebendo as transações em um DataFrame
         
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        Aceita diretamente a saída de OFXParser.parse_ofx_to_frame.
+        """
+        frame = self._prepare_frame(frame)
+        inserted = []
+        skipped = 0
+        possible_duplicates = []
         
-        # Filtrar transações do mês atual
-        month_transactions = self.transactions[
-            pd.to_datetime(self.transactions['data']).dt.month == current_month
-        ]
+        with self._lock:
+            # Cada conta é deduplicada só contra o próprio shard
+            for conta, positions in frame.groupby('conta', sort=False).indices.items():
+                part = frame.iloc[positions].reset_index(drop=True)
+                keys = self._frame_keys(part)
+                import_keys = self._shard_import_keys(conta)
+                stored = self.store.load(conta)
+                
+                # Lotes com datas antigas também são comparados com as partições arquivadas do período
+                start = pd.to_datetime(part['data'].min()) - timedelta(days=window_days)
+                end = pd.to_datetime(part['data'].max()) + timedelta(days=window_days)
+                archived = [f for _, f in self.store.iter_archive(
+                    [conta], start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))]
+                if archived:
+                    import_keys = import_keys | set(self._frame_keys(pd.concat(archived)))
+                    stored = pd.concat([stored] + archived, ignore_index=True)
+                
+                seen = set()
+                keep = np.zeros(len(keys), dtype=bool)
+                for i, key in enumerate(keys):
+                    # O conjunto local também elimina repetições dentro do próprio lote
+                    keep[i] = key not in import_keys and key not in seen
+                    seen.add(key)
+                skipped += int((~keep).sum())
+                part = part[keep].reset_index(drop=True)
+                keys = [key for key, new in zip(keys, keep) if new]
+                
+                duplicates = self._find_import_duplicates(part, stored, window_days, min_similarity)
+                possible_duplicates.extend(duplicates)
+                
+                if skip_possible_duplicates and duplicates:
+                    duplicated = np.zeros(len(part), dtype=bool)
+                    duplicated[[d['posicao'] for d in duplicates]] = True
+                    skipped += int(duplicated.sum())
+                    part = part[~duplicated].reset_index(drop=True)
+                    keys = [key for key, dup in zip(keys, duplicated) if not dup]
+                
+                if not part.empty:
+                    inserted.append(self._append_frame(part, keys))
+            
+            if inserted:
+                inserted = pd.concat(inserted, ignore_index=True)
+                self._notify_inserted(inserted)
         
-        return month_transactions['valor'].sum()
+        return {
+            'inserted': len(inserted),
+            'skipped': skipped,
+            'possible_duplicates': [
+                {'nova': d['nova'], 'existente': d['existente'], 'similaridade': d['similaridade']}
+                for d in possible_duplicates
+            ]
+        }
     
-    def get_monthly_income(self):
-        """Calcula receitas do mês atual"""
-        if self.transactions.empty:
-            return 0.0
+    def _find_import_duplicates(self, frame, stored, window_days, min_similarity):
+        """Compara transações novas com as salvas (da mesma conta) que têm o mesmo valor"""
+        if frame.empty or stored.empty:
+            return []
         
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        new_cents = np.rint(frame['valor'].to_numpy(dtype=float) * 100).astype(np.int64)
+        stored_cents = np.rint(stored['valor'].to_numpy(dtype=float) * 100).astype(np.int64)
+        existing = stored[np.isin(stored_cents, new_cents)]
+        if existing.empty:
+            return []
+        
+        offset = len(existing)
+        candidates = pd.concat([existing[['data', 'descricao', 'valor']], frame[['data', 'descricao', 'valor']]],
+                               ignore_index=True)
+        pairs = find_duplicate_pairs(
+            candidates['data'].to_numpy(), candidates['valor'].to_numpy(dtype=float),
+            candidates['descricao'].to_numpy(), window_days, min_similarity
+        )
+        
+        duplicates = []
+        for a, b, similarity in pairs:
+            # Só interessam pares entre uma transação salva e uma nova
+            if a < offset <= b:
+                duplicates.append({
+                    'posicao': b - offset,
+                    'nova': candidates.iloc[b].to_dict(),
+                    'existente': candidates.iloc[a].to_dict(),
+                    'similaridade': similarity
+                })
+        return duplicates
+    
+    def find_duplicates(self, window_days=3, min_similarity=0.6):
+        """
+        Auditoria de possíveis duplicatas em todas as transações salvas
         
-        # Filtrar receitas do mês atual
-        month_income = self.transactions[
-            (pd.to_datetime(self.transactions['data']).dt.month == current_month) &
-            (self.transactions['valor'] > 0)
+        As contas são percorridas uma por vez, comparando só transações da mesma conta.
+        
+        Returns:
+            DataFrame com um par de transações por linha e a similaridade das descrições
+        """
+        results = []
+        for conta, transactions in self.store.iter_frames():
+            if len(transactions) < 2:
+                continue
+            
+            pairs = find_duplicate_pairs(
+                transactions['data'].to_numpy(), transactions['valor'].to_numpy(dtype=float),
+                transactions['descricao'].to_numpy(), window_days, min_similarity
+            )
+            if not pairs:
+                continue
+            
+            a, b, similarity = (list(column) for column in zip(*pairs))
+            first = transactions.iloc[a][['data', 'descricao', 'valor']].reset_index(drop=True)
+            second = transactions.iloc[b][['data', 'descricao']].reset_index(drop=True)
+            result = first.rename(columns={'data': 'data_a', 'descricao': 'descricao_a'})
+            result['data_b'] = second['data']
+            result['descricao_b'] = second['descricao']
+            result['similaridade'] = similarity
+            result['conta'] = conta
+            results.append(result)
+        
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results, ignore_index=True)
+    
+    def _dedup_key(self, data, valor, descricao, fitid=None, conta=None):
+        """Monta a chave de deduplicação a partir dos campos de uma transação"""
+        if fitid:
+            # O FITID só é único dentro da conta
+            return f"fitid:{conta or ''}:{fitid}"
+        raw = f"{conta or ''}|{data}|{float(valor or 0):.2f}|{descricao or ''}"
+        return "hash:" + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def _frame_keys(self, frame):
+        """Chaves de deduplicação das linhas de um DataFrame"""
+        return [
+            self._dedup_key(data, valor, descricao, fitid, conta)
+            for data, valor, descricao, fitid, conta in zip(
+                frame['data'], frame['valor'], frame['descricao'], frame['fitid'], frame['conta']
+            )
         ]
+    
+    def _shard_import_keys(self, conta):
+        """Índice de deduplicação de uma conta, montado na primeira importação para ela"""
+        cache = self.store.cache(conta)
+        if 'import_keys' not in cache:
+            cache['import_keys'] = set(self._frame_keys(self.store.load(conta)))
+        return cache['import_keys']
+    
+    def update_accounts(self, statements):
+        """
+        Registra as contas de extratos importados (ver OFXParser.parse_ofx_statements)
         
-        return month_income['valor'].sum()
+        Para cada conta é mantido o saldo (LEDGERBAL) do extrato mais recente.
+        """
+        with self._lock:
+            for statement in statements:
+                conta = statement['conta']
+                account = self.accounts.get(conta, {})
+                if account.get('data_saldo') and statement.get('data_saldo') and \
+                        statement['data_saldo'] < account['data_saldo']:
+                    continue
+                self.accounts[conta] = {
+                    key: statement.get(key) for key in ('conta', 'tipo_conta', 'banco', 'saldo', 'data_saldo')
+                }
+            self._save_accounts()
     
-    def get_monthly_expenses(self):
-        """Calcula despesas do mês atual"""
-        if self.transactions.empty:
-            return 0.0
+    def get_accounts(self):
+        """
+        Retorna as contas conhecidas com o saldo do extrato e o calculado pelas transações
+        """
+        accounts = []
+        for conta in sorted(set(self.accounts) | set(self.store.shard_ids())):
+            stats = self.store.stats(conta)
+            account = dict(self.accounts.get(conta, {'conta': conta, 'tipo_conta': '', 'banco': '',
+                                                     'saldo': None, 'data_saldo': None}))
+            account['total_transacoes'] = stats['total']
+            account['saldo_transacoes'] = stats['soma']
+            accounts.append(account)
+        return accounts
+    
+    def get_current_balance(self, conta=None):
+        """Calcula o saldo atual (de todas as contas ou de uma só), sem carregar transações"""
+        return self.store.stats(conta)['soma']
+    
+    def _month_totals(self, frame):
+        """Saldo, receitas e despesas do mês atual em um DataFrame de transações"""
+        if frame.empty:
+            return 0.0, 0.0, 0.0
         
         current_month = datetime.now().month
-        current_year = datetime.now().year
         
-        # Filtrar despesas do mês atual
-        month_expenses = self.transactions[
-            (pd.to_datetime(self.transactions['data']).dt.month == current_month) &
-            (self.transactions['valor'] < 0)
-        ]
+        # Filtrar transações do mês atual
+        valores = frame['valor'][pd.to_datetime(frame['data']).dt.month == current_month]
         
-        return abs(month_expenses['valor'].sum())
+        return (
+            float(valores.sum()),
+            float(valores[valores > 0].sum()),
+            float(abs(valores[valores < 0].sum()))
+        )
+    
+    def _dashboard_totals(self):
+        """Saldo, receitas e despesas do mês atual de todas as contas, somando os resumos dos shards"""
+        totals = [summary['totals'] for summary in self._shard_summaries()]
+        return tuple(float(sum(values)) for values in zip(*totals)) if totals else (0.0, 0.0, 0.0)
+    
+    def get_balance_change(self):
+        """Calcula a mudança no saldo do mês atual"""
+        return self._dashboard_totals()[0]
+    
+    def get_monthly_income(self):
+        """Calcula receitas do mês atual"""
+        return self._dashboard_totals()[1]
+    
+    def get_monthly_expenses(self):
+        """Calcula despesas do mês atual"""
+        return self._dashboard_totals()[2]
     
     def get_total_transactions(self):
         """Retorna o número total de transações"""
-        return len(self.transactions)
+        return self.store.stats()['total']
     
     def get_recent_transactions(self, limit=10):
         """Retorna as transações mais recentes"""
-        if self.transactions.empty:
+        with self._lock:
+            if limit <= SUMMARY_RECENT_ROWS:
+                frames = [summary['recent'] for summary in self._shard_summaries()]
+            else:
+                frames = [frame.sort_values('data', ascending=False).head(limit)
+                          for _, frame in self._iter_shards()]
+        
+        recent = self._concat_frames(frames)
+        if recent.empty:
             return pd.DataFrame()
         
         # Ordenar por data e retornar as mais recentes
-        sorted_transactions = self.transactions.sort_values('data', ascending=False)
-        return sorted_transactions.head(limit)
+        return recent.sort_values('data', ascending=False).head(limit)
     
-    def get_filtered_transactions(self, data_inicio=None, data_fim=None, categoria=None, tipo=None):
-        """Retorna transações filtradas"""
-        if self.transactions.empty:
-            return pd.DataFrame()
+    def get_filtered_transactions(self, data_inicio=None, data_fim=None, categoria=None, tipo=None, conta=None,
+                                  q=None):
+        """
+        Retorna transações filtradas
         
-        filtered = self.transactions.copy()
+        Com q, só as que têm na descrição todas as palavras buscadas (ver DescriptionIndex).
+        """
+        # Com conta, carrega só o shard dela; do arquivo, só os anos do período
+        if q:
+            filtered = self._search_transactions(q, data_inicio, data_fim, conta)
+        else:
+            filtered = self._transactions_in_range(data_inicio, data_fim, conta)
+        if filtered.empty:
+            return pd.DataFrame()
         
+        return self._filter_frame(filtered.copy(), data_inicio, data_fim, categoria, tipo).sort_values('data', ascending=False)
+    
+    def _filter_frame(self, filtered, data_inicio=None, data_fim=None, categoria=None, tipo=None):
+        """Aplica os filtros de período, categoria e tipo a um DataFrame de transações"""
         # Filtrar por data
         if data_inicio:
             filtered = filtered[pd.to_datetime(filtered['data']) >= pd.to_datetime(data_inicio)]
@@ -189,15 +928,16 @@ class TransactionManager:
             elif tipo == "Despesa":
                 filtered = filtered[filtered['valor'] < 0]
         
-        return filtered.sort_values('data', ascending=False)
+        return filtered
     
     def get_category_chart(self):
         """Gera gráfico de despesas por categoria"""
-        if self.transactions.empty:
+        transactions = self.transactions
+        if transactions.empty:
             return None
         
         # Filtrar apenas despesas
-        expenses = self.transactions[self.transactions['valor'] < 0].copy()
+        expenses = transactions[transactions['valor'] < 0].copy()
         
         if expenses.empty:
             return None
@@ -208,7 +948,8 @@ class TransactionManager:
         if category_data.empty:
             return None
         
-        # Criar gráfico
+        # Criar gráfico (plotly só é importado quando um gráfico é pedido)
+        import plotly.express as px
         fig = px.pie(
             values=category_data.values,
             names=category_data.index,
@@ -219,13 +960,14 @@ class TransactionManager:
     
     def get_cashflow_chart(self):
         """Gera gráfico de fluxo de caixa"""
-        if self.transactions.empty:
+        transactions = self.transactions
+        if transactions.empty:
             return None
         
         # Filtrar últimos 30 dias
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_transactions = self.transactions[
-            pd.to_datetime(self.transactions['data']) >= thirty_days_ago
+        recent_transactions = transactions[
+            pd.to_datetime(transactions['data']) >= thirty_days_ago
         ].copy()
         
         if recent_transactions.empty:
@@ -242,6 +984,7 @@ class TransactionManager:
         daily_data['saldo_acumulado'] = daily_data['valor'].cumsum()
         
         # Criar gráfico
+        import plotly.graph_objects as go
         fig = go.Figure()
         
         fig.add_trace(go.Scatter(
@@ -286,6 +1029,72 @@ class TransactionManager:
             del self.categorization_rules[keyword.lower()]
             self._save_categorization_rules()
     
+    def _get_categorizer(self):
+        """Categorizador ativo; sem modelo salvo, é treinado antes com o histórico (uma vez)"""
+        if self.categorizer is not None and not self._categorizer_ready:
+            if not self.categorizer.is_trained():
+                self.train_categorizer()
+            self._categorizer_ready = True
+        return self.categorizer
+    
+    def train_categorizer(self):
+        """Treina o categorizador do zero com todas as transações categorizadas (exceto "Outros")"""
+        if self.categorizer is None:
+            return
+        
+        with self._lock:
+            self.categorizer.fit([], [])
+            for source in (self.store.iter_frames(), self.store.iter_archive()):
+                for _, frame in source:
+                    known = frame[frame['categoria'] != "Outros"]
+                    self.categorizer.partial_fit(known['descricao'], known['categoria'])
+            self.categorizer.save()
+    
+    def _apply_categorizer(self, frame):
+        """Aprende com as transações categorizadas do lote e categoriza as que ficaram em "Outros" """
+        categorizer = self._get_categorizer()
+        if categorizer is None or frame.empty:
+            return frame
+        
+        with CATEGORIZE_SECONDS.time(method='modelo'):
+            other = (frame['categoria'] == "Outros").to_numpy()
+            if not other.all():
+                categorizer.partial_fit(frame['descricao'][~other], frame['categoria'][~other])
+                categorizer.maybe_save()
+            
+            if other.any() and categorizer.is_trained():
+                categories, confidences = categorizer.predict(frame['descricao'][other])
+                confident = confidences >= self.categorizer_min_confidence
+                if confident.any():
+                    frame = frame.copy()
+                    frame.iloc[np.flatnonzero(other)[confident], frame.columns.get_loc('categoria')] = categories[confident]
+                    CATEGORIZED.inc(int(confident.sum()), method='modelo')
+        return frame
+    
+    def suggest_categories(self, descriptions):
+        """
+        Categoria sugerida para cada descrição: regras primeiro, depois o categorizador
+        
+        Returns:
+            lista de dicts com descricao, categoria e confianca (1 para regras,
+            0 quando nada se aplica)
+        """
+        suggestions = []
+        for description in descriptions:
+            category = self._apply_categorization_rules(description)
+            suggestions.append({'descricao': description, 'categoria': category,
+                                'confianca': 0.0 if category == "Outros" else 1.0})
+        
+        categorizer = self._get_categorizer()
+        pending = [i for i, s in enumerate(suggestions) if s['categoria'] == "Outros"]
+        if categorizer is not None and pending and categorizer.is_trained():
+            categories, confidences = categorizer.predict([descriptions[i] for i in pending])
+            for i, category, confidence in zip(pending, categories, confidences):
+                if confidence >= self.categorizer_min_confidence:
+                    suggestions[i]['categoria'] = category
+                    suggestions[i]['confianca'] = round(float(confidence), 3)
+        return suggestions
+    
     def _apply_categorization_rules(self, description):
         """Aplica regras de categorização a uma descrição"""
         if not description:
@@ -299,9 +1108,142 @@ class TransactionManager:
         
         return "Outros"
     
-    def generate_report(self, periodo, data_inicio=None, data_fim=None):
-        """Gera relatório financeiro"""
-        if self.transactions.empty:
+    def aggregate(self, group_by, metrics=('sum', 'count'), data_inicio=None, data_fim=None,
+                  categoria=None, tipo=None, conta=None):
+        """
+        Agrega os valores das transações por dimensões escolhidas
+        
+        Consultas por mês (ou sem período), sem filtro de tipo e com datas em
+        meses inteiros são respondidas pelos resumos mensais pré-agregados,
+        sem passar pelas transações; as demais usam groupby sobre as
+        transações filtradas.
+        
+        Args:
+            group_by: dimensões de AGGREGATE_DIMENSIONS (no máximo uma entre day, week e month)
+            metrics: métricas de AGGREGATE_METRICS
+            data_inicio, data_fim, categoria, tipo, conta: mesmos filtros de get_filtered_transactions
+        
+        Returns:
+            (lista de dicts, um por grupo, com as dimensões e as métricas; fonte: 'rollup' ou 'transacoes')
+        """
+        group_by = list(group_by)
+        metrics = list(metrics)
+        invalid = [d for d in group_by if d not in AGGREGATE_DIMENSIONS] + \
+                  [m for m in metrics if m not in AGGREGATE_METRICS]
+        if invalid:
+            raise ValueError(f"Dimensões ou métricas inválidas: {', '.join(invalid)}")
+        if len([d for d in group_by if d in ('day', 'week', 'month')]) > 1:
+            raise ValueError("Use no máximo uma dimensão de período (day, week ou month)")
+        if not metrics:
+            raise ValueError("Informe ao menos uma métrica")
+        
+        if self._rollup_applies(group_by, data_inicio, data_fim, tipo):
+            result, source = self._aggregate_rollups(group_by, metrics, data_inicio, data_fim, categoria, conta), 'rollup'
+        else:
+            frame = self._filter_frame(self._transactions_in_range(data_inicio, data_fim, conta),
+                                       data_inicio, data_fim, categoria, tipo)
+            if conta is not None:
+                frame = frame[frame['conta'] == conta]
+            result, source = self._aggregate_frame(frame, group_by, metrics), 'transacoes'
+        
+        for metric in metrics:
+            if metric != 'count':
+                result[metric] = result[metric].astype(float).round(2)
+        return result.to_dict('records'), source
+    
+    def _period_keys(self, frame, dimension):
+        """Chave de período de cada transação: dia, segunda-feira da semana ou AAAA-MM"""
+        if dimension == 'day':
+            return frame['data'].astype(str).str[:10]
+        if dimension == 'month':
+            return frame['data'].astype(str).str[:7]
+        days = pd.to_datetime(frame['data']).to_numpy().astype('datetime64[D]')
+        # 1970-01-01 foi uma quinta-feira: (dias + 3) % 7 é o dia da semana com segunda = 0
+        weekday = (days.astype(np.int64) + 3) % 7
+        return pd.Series((days - weekday).astype(str), index=frame.index)
+    
+    def _aggregate_frame(self, frame, group_by, metrics):
+        """groupby vetorizado sobre transações"""
+        if frame.empty:
+            return pd.DataFrame(columns=group_by + metrics)
+        
+        keys = [self._period_keys(frame, d) if d in ('day', 'week', 'month') else frame[d] for d in group_by]
+        functions = [AGGREGATE_METRICS[m] for m in metrics]
+        if not keys:
+            return frame['valor'].agg(functions).to_frame().T.set_axis(metrics, axis=1).reset_index(drop=True)
+        
+        grouped = frame['valor'].groupby(keys).agg(functions)
+        grouped.columns = metrics
+        grouped.index.names = group_by
+        return grouped.reset_index()
+    
+    def _rollup_applies(self, group_by, data_inicio, data_fim, tipo):
+        """Indica se a consulta pode ser respondida pelos resumos mensais"""
+        if any(d in ('day', 'week') for d in group_by) or (tipo and tipo != "Todos"):
+            return False
+        start_ok = not data_inicio or pd.to_datetime(data_inicio).day == 1
+        end_ok = not data_fim or pd.to_datetime(data_fim).is_month_end
+        return start_ok and end_ok
+    
+    def _monthly_rollup(self, frame):
+        """Resumo mensal (soma, contagem, mínimo e máximo) de um DataFrame de transações"""
+        if frame.empty:
+            return pd.DataFrame(columns=ROLLUP_DIMENSIONS + ['sum', 'count', 'min', 'max'])
+        keys = [self._period_keys(frame, 'month')] + [frame[d] for d in ROLLUP_DIMENSIONS[1:]]
+        rollup = frame['valor'].groupby(keys).agg(['sum', 'count', 'min', 'max'])
+        rollup.index.names = ROLLUP_DIMENSIONS
+        return rollup.reset_index()
+    
+    def _get_rollups(self):
+        """
+        Resumos mensais das transações recentes e das arquivadas
+        
+        O das recentes vem dos resumos dos shards, refeitos só nos shards que
+        mudaram; o do arquivo, só quando transações são arquivadas.
+        """
+        with self._lock:
+            recent = [summary['rollup'] for summary in self._shard_summaries()]
+            if self._rollups.get('archive_version') != self.store.archive_version:
+                self._rollups['archive'] = [self._monthly_rollup(frame) for _, frame in self.store.iter_archive()]
+                self._rollups['archive_version'] = self.store.archive_version
+            frames = [frame for frame in recent + self._rollups['archive'] if not frame.empty]
+            if not frames:
+                return self._monthly_rollup(pd.DataFrame(columns=COLUMNS))
+            return pd.concat(frames, ignore_index=True)
+    
+    def _aggregate_rollups(self, group_by, metrics, data_inicio, data_fim, categoria, conta):
+        """Reagrupa os resumos mensais: soma das somas e contagens, mínimo dos mínimos..."""
+        rollup = self._get_rollups()
+        if data_inicio:
+            rollup = rollup[rollup['month'] >= pd.to_datetime(data_inicio).strftime('%Y-%m')]
+        if data_fim:
+            rollup = rollup[rollup['month'] <= pd.to_datetime(data_fim).strftime('%Y-%m')]
+        if categoria and categoria != "Todas":
+            rollup = rollup[rollup['categoria'] == categoria]
+        if conta is not None:
+            rollup = rollup[rollup['conta'] == conta]
+        
+        if rollup.empty:
+            return pd.DataFrame(columns=group_by + metrics)
+        
+        combine = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+        if group_by:
+            grouped = rollup.groupby(group_by)[['sum', 'count', 'min', 'max']].agg(combine).reset_index()
+        else:
+            grouped = rollup[['sum', 'count', 'min', 'max']].agg(combine).to_frame().T
+        
+        grouped['avg'] = grouped['sum'] / grouped['count']
+        grouped['count'] = grouped['count'].astype(np.int64)
+        return grouped[group_by + metrics]
+    
+    def generate_report(self, periodo, data_inicio=None, data_fim=None, charts=True):
+        """
+        Gera relatório financeiro
+        
+        Com charts=False, category_chart e monthly_chart saem como None e o
+        plotly não é importado (a API só devolve os totais).
+        """
+        if self.get_total_transactions() == 0:
             return None
         
         # Determinar período
@@ -319,7 +1261,7 @@ class TransactionManager:
         if data_inicio and data_fim:
             filtered_transactions = self.get_filtered_transactions(data_inicio, data_fim)
         else:
-            filtered_transactions = self.transactions.copy()
+            filtered_transactions = self._transactions_in_range().copy()
         
         if filtered_transactions.empty:
             return None
@@ -342,6 +1284,25 @@ class TransactionManager:
             top_categories_df = pd.DataFrame()
         
         # Gráficos
+        category_chart = None
+        monthly_chart = None
+        if charts:
+            category_chart, monthly_chart = self._report_charts(filtered_transactions, expenses)
+        
+        return {
+            'total_receitas': total_receitas,
+            'total_despesas': total_despesas,
+            'saldo': saldo,
+            'num_transacoes': num_transacoes,
+            'top_categories': top_categories_df,
+            'category_chart': category_chart,
+            'monthly_chart': monthly_chart
+        }
+    
+    def _report_charts(self, filtered_transactions, expenses):
+        """Gráficos do relatório: distribuição por categoria e evolução mensal"""
+        import plotly.express as px
+        
         category_chart = None
         if not expenses.empty:
             category_data = expenses.groupby('categoria')['valor'].sum().abs()
@@ -368,34 +1329,121 @@ class TransactionManager:
                 color_continuous_scale=['red', 'green']
             )
         
-        return {
-            'total_receitas': total_receitas,
-            'total_despesas': total_despesas,
-            'saldo': saldo,
-            'num_transacoes': num_transacoes,
-            'top_categories': top_categories_df,
-            'category_chart': category_chart,
-            'monthly_chart': monthly_chart
-        }
+        return category_chart, monthly_chart
     
     def clear_all_transactions(self):
         """Remove todas as transações"""
-        self.transactions = pd.DataFrame(columns=['data', 'descricao', 'valor', 'categoria', 'tipo', 'origem'])
-        self._save_transactions()
+        self._replace_transactions(pd.DataFrame(columns=COLUMNS))
     
     def export_data(self):
         """Exporta todos os dados"""
         return {
-            'transactions': self.transactions.to_dict('records'),
+            'transactions': self._transactions_in_range().to_dict('records'),
             'categories': self.categories,
-            'categorization_rules': self.categorization_rules
+            'categorization_rules': self.categorization_rules,
+            'accounts': self.accounts
         }
     
+    def iter_export(self, format='csv', data_inicio=None, data_fim=None, categoria=None, tipo=None,
+                    conta=None, chunk_size=50000, q=None):
+        """
+        Exporta transações em blocos, sem montar o arquivo inteiro na memória
+        
+        Os shards e as partições arquivadas do período são lidos um por vez e
+        convertidos em fatias de chunk_size linhas. A memória usada depende do
+        maior shard e de chunk_size, não do total exportado.
+        
+        Args:
+            format: 'csv', 'json' (mesmo formato do backup, sem indentação),
+                'columns' (uma linha JSON por bloco, no formato de frame_to_columns) ou
+                'parquet' (requer o pacote pyarrow)
+            data_inicio, data_fim, categoria, tipo, conta, q: mesmos filtros de get_filtered_transactions
+        
+        Yields:
+            pedaços do arquivo em bytes
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {format}")
+        
+        chunks = self._iter_export_chunks(data_inicio, data_fim, categoria, tipo, conta, chunk_size, q)
+        if format == 'csv':
+            return self._export_csv(chunks)
+        if format == 'json':
+            return self._export_json(chunks)
+        if format == 'columns':
+            return self._export_columns(chunks)
+        
+        # Verificado antes de começar a gerar, para que o erro chegue antes dos dados
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("A exportação em Parquet requer o pacote pyarrow")
+        return self._export_parquet(chunks, pa, pq)
+    
+    def _iter_export_chunks(self, data_inicio, data_fim, categoria, tipo, conta, chunk_size, q=None):
+        """Percorre as transações filtradas em fatias, shard por shard"""
+        start = pd.to_datetime(data_inicio).strftime('%Y-%m-%d') if data_inicio else None
+        end = pd.to_datetime(data_fim).strftime('%Y-%m-%d') if data_fim else None
+        shard_ids = None if conta is None else [conta]
+        
+        sources = (self.store.iter_frames(shard_ids), self.store.iter_archive(shard_ids, start, end))
+        for source in sources:
+            for _, frame in source:
+                if q:
+                    # Cada shard é indexado só para esta exportação, como as partições na busca
+                    frame = frame.iloc[DescriptionIndex(frame['descricao']).search(q)]
+                frame = self._filter_frame(frame, data_inicio, data_fim, categoria, tipo)
+                for offset in range(0, len(frame), chunk_size):
+                    yield frame.iloc[offset:offset + chunk_size]
+    
+    def _export_csv(self, chunks):
+        yield (','.join(COLUMNS) + '\n').encode('utf-8')
+        for chunk in chunks:
+            yield chunk[COLUMNS].to_csv(index=False, header=False).encode('utf-8')
+    
+    def _export_json(self, chunks):
+        """Backup compacto, escrito transação a transação (compatível com import_backup)"""
+        yield b'{"transactions":['
+        first = True
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            # to_json gera '[...]'; os colchetes são removidos para emendar os blocos
+            records = chunk[COLUMNS].to_json(orient='records', force_ascii=False)[1:-1]
+            yield (records if first else ',' + records).encode('utf-8')
+            first = False
+        
+        settings = json.dumps({
+            'categories': self.categories,
+            'categorization_rules': self.categorization_rules,
+            'accounts': self.accounts
+        }, ensure_ascii=False, separators=(',', ':'))
+        yield ('],' + settings[1:]).encode('utf-8')
+    
+    def _export_columns(self, chunks):
+        """JSON Lines com um bloco colunar por linha"""
+        for chunk in chunks:
+            if not chunk.empty:
+                block = json.dumps(frame_to_columns(chunk), ensure_ascii=False, separators=(',', ':'))
+                yield (block + '\n').encode('utf-8')
+    
+    def _export_parquet(self, chunks, pa, pq):
+        """Arquivo Parquet com um row group por bloco"""
+        schema = pa.schema([(column, pa.float64() if column == 'valor' else pa.string()) for column in COLUMNS])
+        sink = _ExportSink()
+        writer = pq.ParquetWriter(sink, schema)
+        for chunk in chunks:
+            chunk = chunk[COLUMNS].astype({'valor': float})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    
     def import_data(self, data):
         """Importa dados de backup"""
         if 'transactions' in data:
-            self.transactions = pd.DataFrame(data['transactions'])
-            self._save_transactions()
+            self._replace_transactions(self._normalize_frame(pd.DataFrame(data['transactions'], columns=COLUMNS)))
         
         if 'categories' in data:
             self.categories = data['categories']
@@ -403,4 +1451,85 @@ class TransactionManager:
         
         if 'categorization_rules' in data:
             self.categorization_rules = data['categorization_rules']
-            self._save_categorization_rules() 
\ No newline at end of file
+            self._save_categorization_rules()
+        
+        if 'accounts' in data:
+            self.accounts = data['accounts']
+            self._save_accounts()
+        
+        if self._listeners:
+            balance_change, income, expenses = self._dashboard_totals()
+            self._notify('reset', {
+                'current_balance': self.get_current_balance(),
+                'balance_change': balance_change,
+                'monthly_income': income,
+                'monthly_expenses': expenses,
+                'total_transactions': self.get_total_transactions()
+            })
+    
+    def import_backup(self, file, chunk_size=5000, progress=None):
+        """
+        Restaura um backup lendo o arquivo aos poucos (ver BackupReader)
+        
+        As transações são gravadas lote a lote em um diretório temporário, que
+        só substitui o atual no fim; a memória usada depende de chunk_size e
+        não do tamanho do backup. Categorias, regras e contas são aplicadas
+        depois das transações. Se o backup for inválido, nada é alterado.
+        
+        Args:
+            file: arquivo de backup aberto (texto ou binário)
+            chunk_size: número de transações por lote
+            progress: função chamada após cada lote com (transações lidas, bytes lidos)
+        
+        Returns:
+            número de transações restauradas
+        """
+        staging_dir = self.data_dir + '.restore'
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        staging = TransactionStore(staging_dir, COLUMNS, self.store.max_loaded_shards,
+                                   self.store.archive_after_days)
+        reader = BackupReader(file, chunk_size)
+        settings = {}
+        restored = None
+        
+        try:
+            for key, value in reader:
+                if key != 'transactions':
+                    settings[key] = value
+                    continue
+                
+                frame = self._normalize_frame(pd.DataFrame(value, columns=COLUMNS))
+                for conta, positions in frame.groupby('conta', sort=False).indices.items():
+                    staging.append(conta, frame.iloc[positions])
+                restored = (restored or 0) + len(frame)
+                if progress:
+                    progress(restored, reader.bytes_read)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        with self._lock:
+            if restored is None:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            else:
+                staging.archive()
+                self._swap_store(staging_dir)
+            self.import_data(settings)
+        
+        return restored or 0
+    
+    def _swap_store(self, new_dir):
+        """Troca o diretório de transações por outro já preenchido"""
+        old_dir = self.data_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.isdir(self.data_dir):
+            os.replace(self.data_dir, old_dir)
+        os.replace(new_dir, self.data_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        
+        # O store novo recomeça a contagem de versões
+        self._version_offset += self.store.version + 1
+        self.store = TransactionStore(self.data_dir, COLUMNS, self.store.max_loaded_shards,
+                                      self.store.archive_after_days)
+        self._summaries = {}
+        self._rollups = {}
@@ -0,0 +1,389 @@
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import quote, unquote
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from metrics import REGISTRY
+
+READ_SECONDS = REGISTRY.histogram('store_read_seconds', 'Duração das leituras de shards e partições do disco')
+WRITE_SECONDS = REGISTRY.histogram('store_write_seconds', 'Duração das gravações de shards, partições e manifesto')
+WRITTEN_BYTES = REGISTRY.counter('store_written_bytes_total', 'Bytes gravados em shards, partições e manifesto')
+SHARD_CACHE = REGISTRY.counter('store_shard_cache_total', 'Acessos a shards, por resultado no LRU (hit ou miss)')
+
+class TransactionStore:
+    """
+    Armazenamento de transações particionado por conta (shard)
+    
+    Cada conta fica em um arquivo JSON Lines próprio dentro de `base_dir`.
+    Os shards são carregados só no primeiro acesso e mantidos em um LRU de
+    tamanho limitado, de modo que a memória acompanha as contas em uso e não
+    o total de dados. Inserções acrescentam linhas ao fim do arquivo, sem
+    reescrever o shard inteiro.
+    
+    Com `archive_after_days`, transações mais antigas que o horizonte saem do
+    shard ao ser lido e vão para arquivos anuais compactados
+    (archive/<shard>/<ano>.jsonl.gz), que só são lidos quando uma consulta
+    pede um período que os inclui.
+    
+    Um manifesto (manifest.json) guarda, por shard e por ano arquivado, o
+    número de transações, a soma dos valores e as datas extremas, para totais,
+    saldos e seleção de partições sem carregar nenhum arquivo.
+    """
+    
+    MANIFEST_FILE = "manifest.json"
+    ARCHIVE_DIR = "archive"
+    
+    def __init__(self, base_dir, columns, max_loaded_shards=16, archive_after_days=None):
+        self.base_dir = base_dir
+        self.columns = columns
+        self.max_loaded_shards = max_loaded_shards
+        self.archive_after_days = archive_after_days
+        self._lock = threading.RLock()
+        self._loaded = OrderedDict()
+        self._caches = {}
+        self._manifest = None
+        # Incrementados a cada escrita (e a cada mudança no arquivo), para quem
+        # mantém dados derivados dos shards
+        self.version = 0
+        self.archive_version = 0
+        # Versão da última escrita de cada shard (0 se não mudou desde que o store abriu)
+        self._shard_versions = {}
+    
+    def _shard_path(self, shard_id):
+        """Caminho do arquivo de um shard (o id é codificado para ser um nome de arquivo válido)"""
+        return os.path.join(self.base_dir, f"shard_{quote(shard_id, safe='')}.jsonl")
+    
+    def _partition_path(self, shard_id, year):
+        """Caminho da partição anual arquivada de um shard"""
+        return os.path.join(self.base_dir, self.ARCHIVE_DIR, quote(shard_id, safe=''), f"{year}.jsonl.gz")
+    
+    def _empty_frame(self):
+        return pd.DataFrame(columns=self.columns)
+    
+    def _read_lines(self, path, compression=None):
+        """Lê um arquivo JSON Lines de transações"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return self._empty_frame()
+        
+        # dtype=False preserva textos como '001' (FITID) e as datas como texto
+        frame = pd.read_json(path, lines=True, dtype=False, convert_dates=False, compression=compression)
+        for column in self.columns:
+            if column not in frame.columns:
+                frame[column] = ''
+        return frame
+    
+    def _read_shard(self, shard_id):
+        """Lê um shard do disco, arquivando antes as transações fora do horizonte"""
+        with READ_SECONDS.time(kind='shard'):
+            frame = self._read_lines(self._shard_path(shard_id))
+        cutoff = self.archive_cutoff()
+        if cutoff and not frame.empty and frame['data'].min() < cutoff:
+            # O arquivamento reescreve o shard: ele é relido sob o lock, para não
+            # perder linhas acrescentadas (ou arquivadas) depois da leitura acima
+            with self._lock:
+                with READ_SECONDS.time(kind='shard'):
+                    frame = self._read_lines(self._shard_path(shard_id))
+                if not frame.empty and frame['data'].min() < cutoff:
+                    frame = self._archive_frame(shard_id, frame, cutoff)
+        return frame
+    
+    def _read_partition(self, shard_id, year):
+        """Lê uma partição anual arquivada"""
+        with READ_SECONDS.time(kind='partition'):
+            return self._read_lines(self._partition_path(shard_id, year), compression='gzip')
+    
+    def _write_lines(self, path, frame, mode):
+        """Grava linhas de um DataFrame em JSON Lines"""
+        if frame.empty:
+            if mode == 'w':
+                open(path, 'w').close()
+            return
+        start = time.perf_counter()
+        with open(path, mode, encoding='utf-8') as f:
+            position = f.tell()
+            f.write(frame.to_json(orient='records', lines=True, force_ascii=False))
+            f.write('\n')
+            WRITTEN_BYTES.inc(f.tell() - position, kind='shard')
+        WRITE_SECONDS.observe(time.perf_counter() - start, kind='shard')
+    
+    def _write_partition(self, shard_id, year, frame):
+        """Acrescenta linhas a uma partição arquivada (cada escrita vira um novo membro gzip)"""
+        path = self._partition_path(shard_id, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        with WRITE_SECONDS.time(kind='partition'):
+            with gzip.open(path, 'at', encoding='utf-8') as f:
+                f.write(frame.to_json(orient='records', lines=True, force_ascii=False))
+                f.write('\n')
+        WRITTEN_BYTES.inc(os.path.getsize(path) - size, kind='partition')
+    
+    def _remember(self, shard_id, frame):
+        """Coloca o shard no LRU, descartando o menos usado se passar do limite"""
+        self._loaded[shard_id] = frame
+        self._loaded.move_to_end(shard_id)
+        while len(self._loaded) > self.max_loaded_shards:
+            evicted, _ = self._loaded.popitem(last=False)
+            self._caches.pop(evicted, None)
+    
+    # Manifesto
+    
+    def _load_manifest(self):
+        """Carrega o manifesto, reconstruindo-o a partir dos shards se não existir"""
+        if self._manifest is not None:
+            return self._manifest
+        
+        path = os.path.join(self.base_dir, self.MANIFEST_FILE)
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+                return self._manifest
+        except Exception as e:
+            print(f"Erro ao carregar manifesto, reconstruindo: {str(e)}")
+        
+        self._manifest = {}
+        if os.path.isdir(self.base_dir):
+            for name in os.listdir(self.base_dir):
+                if name.startswith('shard_') and name.endswith('.jsonl'):
+                    shard_id = unquote(name[len('shard_'):-len('.jsonl')])
+                    self._manifest[shard_id] = self._stats(self._read_lines(self._shard_path(shard_id)))
+            
+            archive_dir = os.path.join(self.base_dir, self.ARCHIVE_DIR)
+            if os.path.isdir(archive_dir):
+                for name in os.listdir(archive_dir):
+                    shard_id = unquote(name)
+                    entry = self._manifest.setdefault(shard_id, self._stats(self._empty_frame()))
+                    for file_name in os.listdir(os.path.join(archive_dir, name)):
+                        year = file_name.split('.')[0]
+                        entry['arquivo'][year] = self._partition_stats(self._read_partition(shard_id, year))
+        self._save_manifest()
+        return self._manifest
+    
+    def _save_manifest(self):
+        """Salva o manifesto (gravação atômica)"""
+        try:
+            os.makedirs(self.base_dir, exist_ok=True)
+            path = os.path.join(self.base_dir, self.MANIFEST_FILE)
+            temp_path = path + '.tmp'
+            with WRITE_SECONDS.time(kind='manifest'):
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._manifest, f, ensure_ascii=False)
+                    WRITTEN_BYTES.inc(f.tell(), kind='manifest')
+                os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Erro ao salvar manifesto: {str(e)}")
+    
+    def _stats(self, frame):
+        """Entrada do manifesto para um shard: número de transações e soma dos valores"""
+        if frame.empty:
+            return {'total': 0, 'soma': 0.0, 'arquivo': {}}
+        return {'total': int(len(frame)), 'soma': float(frame['valor'].sum()), 'arquivo': {}}
+    
+    def _partition_stats(self, frame, previous=None):
+        """Entrada do manifesto para uma partição arquivada, somada à anterior se houver"""
+        stats = {
+            'total': int(len(frame)),
+            'soma': float(frame['valor'].sum()),
+            'inicio': frame['data'].min(),
+            'fim': frame['data'].max()
+        }
+        if previous:
+            stats['total'] += previous['total']
+            stats['soma'] += previous['soma']
+            stats['inicio'] = min(stats['inicio'], previous['inicio'])
+            stats['fim'] = max(stats['fim'], previous['fim'])
+        return stats
+    
+    def _entry(self, shard_id):
+        """Entrada do manifesto de um shard (criada vazia se não existir)"""
+        entry = self._load_manifest().setdefault(shard_id, self._stats(self._empty_frame()))
+        entry.setdefault('arquivo', {})
+        return entry
+    
+    # Leitura
+    
+    def shard_ids(self):
+        """Ids de todos os shards, sem carregá-los"""
+        with self._lock:
+            return sorted(self._load_manifest())
+    
+    def stats(self, shard_id=None):
+        """Total de transações e soma dos valores (incluindo as arquivadas) de um shard, ou de todos"""
+        with self._lock:
+            manifest = self._load_manifest()
+            shard_ids = list(manifest) if shard_id is None else [shard_id]
+            total = 0
+            soma = 0.0
+            for entry in (manifest[s] for s in shard_ids if s in manifest):
+                partitions = entry.get('arquivo', {}).values()
+                total += entry['total'] + sum(p['total'] for p in partitions)
+                soma += entry['soma'] + sum(p['soma'] for p in partitions)
+            return {'total': total, 'soma': soma}
+    
+    def archive_cutoff(self):
+        """Data (AAAA-MM-DD) antes da qual as transações são arquivadas, ou None"""
+        if self.archive_after_days is None:
+            return None
+        return (datetime.now() - timedelta(days=self.archive_after_days)).strftime('%Y-%m-%d')
+    
+    def load(self, shard_id):
+        """Retorna as transações de um shard, carregando-o no LRU se necessário"""
+        with self._lock:
+            frame = self._loaded.get(shard_id)
+            if frame is None:
+                SHARD_CACHE.inc(result='miss')
+                frame = self._read_shard(shard_id)
+                self._remember(shard_id, frame)
+            else:
+                SHARD_CACHE.inc(result='hit')
+                self._loaded.move_to_end(shard_id)
+            return frame
+    
+    def cache(self, shard_id, load=True):
+        """
+        Dicionário de dados derivados do shard (ex.: índices), válido enquanto ele
+        estiver carregado e descartado junto com ele
+        
+        Com load=False, retorna None se o shard não estiver carregado.
+        """
+        with self._lock:
+            if shard_id not in self._loaded:
+                if not load:
+                    return None
+                self.load(shard_id)
+            return self._caches.setdefault(shard_id, {})
+    
+    def is_loaded(self, shard_id):
+        return shard_id in self._loaded
+    
+    def shard_version(self, shard_id):
+        """Versão do store na última escrita do shard, para dados derivados de um shard só"""
+        return self._shard_versions.get(shard_id, 0)
+    
+    def iter_frames(self, shard_ids=None):
+        """
+        Percorre os shards um por vez
+        
+        Shards fora do LRU são lidos do disco sem entrar nele, para que uma
+        varredura completa não expulse as contas em uso.
+        """
+        for shard_id in (self.shard_ids() if shard_ids is None else shard_ids):
+            with self._lock:
+                frame = self._loaded.get(shard_id)
+            if frame is None:
+                frame = self._read_shard(shard_id)
+            yield shard_id, frame
+    
+    def iter_archive(self, shard_ids=None, start=None, end=None):
+        """
+        Percorre as partições arquivadas que têm transações entre `start` e `end`
+        
+        As datas são textos AAAA-MM-DD; None deixa o período aberto. Partições
+        fora do período não são abertas.
+        """
+        for shard_id in (self.shard_ids() if shard_ids is None else shard_ids):
+            with self._lock:
+                partitions = dict(self._load_manifest().get(shard_id, {}).get('arquivo', {}))
+            for year, partition in sorted(partitions.items()):
+                if (start and partition['fim'] < start) or (end and partition['inicio'] > end):
+                    continue
+                yield shard_id, self._read_partition(shard_id, year)
+    
+    # Escrita
+    
+    def append(self, shard_id, frame):
+        """Acrescenta transações a um shard, gravando só as linhas novas"""
+        if frame.empty:
+            return
+        
+        with self._lock:
+            os.makedirs(self.base_dir, exist_ok=True)
+            frame = frame[self.columns].reset_index(drop=True)
+            # O manifesto é carregado antes da escrita: se precisar ser reconstruído,
+            # não pode contar as linhas novas duas vezes
+            entry = self._entry(shard_id)
+            self._write_lines(self._shard_path(shard_id), frame, 'a')
+            
+            loaded = self._loaded.get(shard_id)
+            if loaded is not None:
+                self._loaded[shard_id] = frame if loaded.empty else pd.concat([loaded, frame], ignore_index=True)
+            
+            added = self._stats(frame)
+            entry['total'] += added['total']
+            entry['soma'] += added['soma']
+            self._save_manifest()
+            self.version += 1
+            self._shard_versions[shard_id] = self.version
+    
+    def replace(self, shard_id, frame):
+        """Substitui todo o conteúdo de um shard"""
+        with self._lock:
+            os.makedirs(self.base_dir, exist_ok=True)
+            frame = frame[self.columns].reset_index(drop=True)
+            path = self._shard_path(shard_id)
+            temp_path = path + '.tmp'
+            self._write_lines(temp_path, frame, 'w')
+            os.replace(temp_path, path)
+            
+            self._caches.pop(shard_id, None)
+            if shard_id in self._loaded:
+                self._loaded[shard_id] = frame
+            
+            entry = self._entry(shard_id)
+            entry.update({key: value for key, value in self._stats(frame).items() if key != 'arquivo'})
+            self._save_manifest()
+            self.version += 1
+            self._shard_versions[shard_id] = self.version
+    
+    def _archive_frame(self, shard_id, frame, cutoff):
+        """
+        Move as linhas anteriores a `cutoff` para as partições anuais e retorna as restantes
+        
+        `frame` precisa ser o conteúdo atual do shard, lido ou obtido do LRU
+        sob o lock que o chamador mantém.
+        """
+        with self._lock:
+            old = (frame['data'] < cutoff).to_numpy()
+            entry = self._entry(shard_id)
+            for year, part in frame[old].groupby(frame['data'][old].str[:4]):
+                self._write_partition(shard_id, year, part)
+                entry['arquivo'][year] = self._partition_stats(part, entry['arquivo'].get(year))
+            
+            recent = frame[~old]
+            self.archive_version += 1
+            self.replace(shard_id, recent)
+            return recent[self.columns].reset_index(drop=True)
+    
+    def archive(self, shard_ids=None):
+        """Arquiva as transações fora do horizonte em todos os shards (ou nos indicados)"""
+        cutoff = self.archive_cutoff()
+        if not cutoff:
+            return
+        for shard_id in (self.shard_ids() if shard_ids is None else shard_ids):
+            with self._lock:
+                frame = self._loaded.get(shard_id)
+                if frame is None:
+                    # A leitura do disco já arquiva o que passou do horizonte
+                    self._read_shard(shard_id)
+                elif not frame.empty and frame['data'].min() < cutoff:
+                    self._archive_frame(shard_id, frame, cutoff)
+    
+    def clear(self):
+        """Remove todos os shards e partições arquivadas"""
+        with self._lock:
+            for shard_id in self.shard_ids():
+                path = self._shard_path(shard_id)
+                if os.path.exists(path):
+                    os.remove(path)
+            shutil.rmtree(os.path.join(self.base_dir, self.ARCHIVE_DIR), ignore_errors=True)
+            self._loaded.clear()
+            self._caches.clear()
+            self._manifest = {}
+            self._save_manifest()
+            self.version += 1
+            self.archive_version += 1